@@ -16,6 +16,7 @@ setuptools.setup(
     url="https://github.com/codilime/trextestdirector",
     packages=setuptools.find_packages(),
     install_requires=["PyYAML"],
+    extras_require={"columnar": ["numpy"], "rx_capture": ["numpy"]},
     classifiers=[
         "Programming Language :: Python :: 3.6",
         "License :: OSI Approved :: MIT License",
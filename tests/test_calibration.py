@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+from trextestdirector.calibration import RateCalibrator
+
+
+class Client:
+    """Client sending `efficiency` of requested rate of 100 byte packets."""
+
+    def __init__(self, efficiency, fail_stats=False):
+        self.efficiency = efficiency
+        self.fail_stats = fail_stats
+        self.rates = {}
+        self.started = {}
+        self.stopped = []
+
+    def start(self, ports, mult, force):
+        for port_id in ports:
+            self.rates[port_id] = 1000 * float(mult) * self.efficiency
+            self.started[port_id] = time.monotonic()
+
+    def stop(self, ports):
+        self.stopped.extend(ports)
+
+    def get_stats(self, ports):
+        if self.fail_stats:
+            raise RuntimeError("stats not available")
+        stats = {}
+        for port_id in ports:
+            packets = self.rates[port_id] * (time.monotonic() - self.started[port_id])
+            stats[port_id] = {"opackets": packets, "obytes": packets * 100}
+        return stats
+
+
+def transmit(*ports):
+    return [{"from": port, "to": "b:0", "tunables": {"pps": 1000}} for port in ports]
+
+
+def test_factor_is_corrected_until_rate_is_within_tolerance():
+    client = Client(efficiency=0.8)
+    servers = [{"name": "a", "client": client}]
+    calibrator = RateCalibrator({"duration": 0.05, "tolerance": 0.02})
+    result = calibrator.calibrate(servers, transmit("a:0"))["a:0"]
+    assert result["converged"]
+    assert result["factor"] == pytest.approx(1.25, rel=0.05)
+    assert result["achieved_pps"] == pytest.approx(1000, rel=0.02)
+    assert result["achieved_bps"] == pytest.approx(result["achieved_pps"] * 800)
+    assert result["iterations"] >= 2
+    assert client.stopped
+
+
+def test_only_ports_of_given_servers_are_calibrated():
+    servers = [{"name": "a", "client": Client(efficiency=1.0)}]
+    calibrator = RateCalibrator({"duration": 0.02, "tolerance": 0.05})
+    results = calibrator.calibrate(servers, transmit("a:0", "c:0"))
+    assert list(results) == ["a:0"]
+
+
+def test_probe_traffic_is_stopped_on_error():
+    client = Client(efficiency=1.0, fail_stats=True)
+    servers = [{"name": "a", "client": client}]
+    with pytest.raises(RuntimeError):
+        RateCalibrator({"duration": 0.01}).calibrate(servers, transmit("a:0", "a:1"))
+    assert client.stopped == [0, 1]
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from trextestdirector.checkpoint import Checkpoint
+from trextestdirector.errors import TrexTestDirectorError
+
+CONFIG = {"servers": [{"name": "a"}], "tests": [{"name": "t1"}]}
+
+
+def test_records_are_appended_and_restored(tmp_path):
+    path = str(tmp_path / "checkpoint")
+    checkpoint = Checkpoint(path, CONFIG)
+    checkpoint.mark_completed("t1", 0, {"a": {"total": 1}})
+    checkpoint.mark_completed("t1", 1, {"a": {"total": 2}})
+    with open(path) as file_handler:
+        assert len(file_handler.readlines()) == 3
+
+    resumed = Checkpoint(path, CONFIG)
+    resumed.load()
+    assert resumed.is_completed("t1", 1)
+    assert not resumed.is_completed("t1", 2)
+    statistics = {"t1": {2: {}}}
+    resumed.restore(statistics)
+    assert statistics == {"t1": {0: {"a": {"total": 1}}, 1: {"a": {"total": 2}}, 2: {}}}
+
+    resumed.mark_completed("t1", 2, {})
+    again = Checkpoint(path, CONFIG)
+    again.load()
+    assert len(again.completed) == 3
+
+
+def test_new_run_starts_file_anew(tmp_path):
+    path = str(tmp_path / "checkpoint")
+    Checkpoint(path, CONFIG).mark_completed("t1", 0, {})
+    Checkpoint(path, CONFIG).mark_completed("t1", 5, {})
+    checkpoint = Checkpoint(path, CONFIG)
+    checkpoint.load()
+    assert checkpoint.completed == {("t1", 5)}
+
+
+def test_broken_last_record_is_dropped(tmp_path):
+    path = str(tmp_path / "checkpoint")
+    Checkpoint(path, CONFIG).mark_completed("t1", 0, {})
+    with open(path, "a") as file_handler:
+        file_handler.write('{"test": "t1", "iter')
+    checkpoint = Checkpoint(path, CONFIG)
+    checkpoint.load()
+    assert checkpoint.completed == {("t1", 0)}
+    checkpoint.mark_completed("t1", 1, {})
+    with open(path) as file_handler:
+        records = [json.loads(line) for line in file_handler]
+    assert [record.get("iteration") for record in records] == [None, 0, 1]
+
+
+@pytest.mark.parametrize("header", ["", '{"config_ha', '{"config_hash": "x"}'])
+def test_broken_header_starts_file_anew(tmp_path, header):
+    path = tmp_path / "checkpoint"
+    path.write_text(header)
+    checkpoint = Checkpoint(str(path), CONFIG)
+    checkpoint.load()
+    assert not checkpoint.completed
+    checkpoint.mark_completed("t1", 0, {})
+    resumed = Checkpoint(str(path), CONFIG)
+    resumed.load()
+    assert resumed.completed == {("t1", 0)}
+
+
+def test_different_config_is_rejected(tmp_path):
+    path = str(tmp_path / "checkpoint")
+    Checkpoint(path, CONFIG).mark_completed("t1", 0, {})
+    with pytest.raises(TrexTestDirectorError):
+        Checkpoint(path, {**CONFIG, "tests": []}).load()
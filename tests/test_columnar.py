@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from trextestdirector.errors import TrexTestDirectorError
+
+numpy = pytest.importorskip("numpy")
+
+from trextestdirector.columnar import (  # noqa: E402
+    ColumnarResults,
+    columnar_to_json,
+    json_to_columnar,
+    save_columnar,
+)
+
+STATISTICS = {
+    "t1": {
+        "0": {
+            "a": {
+                "0": {"opackets": 100, "tx_pps": 10.5},
+                "1": {"opackets": 7, "tx_pps": None},
+                "global": {"cpu_util": 12.25},
+                "flow_stats": {"11": {"rx_pkts": {"0": 90, "1": 3}}},
+                "latency": {"11": {"latency": {"average": 4.5, "jitter": 1}}},
+            },
+            "b": {"0": {"ipackets": 99}},
+        },
+        "1": {"a": {"0": {"opackets": 200, "tx_pps": 20.0}}},
+    },
+    "t2": {"0": {"b": {"0": {"ipackets": 1}}}},
+}
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "stats.col")
+    save_columnar(STATISTICS, path)
+    assert ColumnarResults(path).to_statistics() == STATISTICS
+
+
+def test_non_numeric_values_are_skipped(tmp_path):
+    path = str(tmp_path / "stats.col")
+    save_columnar({"t": {"0": {"a": {"0": {"opackets": 1, "state": "up"}}}}}, path)
+    assert ColumnarResults(path).to_statistics() == {
+        "t": {"0": {"a": {"0": {"opackets": 1}}}}
+    }
+
+
+def test_select_by_names_and_ids(tmp_path):
+    path = str(tmp_path / "stats.col")
+    save_columnar(STATISTICS, path)
+    results = ColumnarResults(path)
+    rows = results.select(test="t1", server="a", metric="{port}/opackets")
+    assert sorted(rows["value"]) == [7, 100, 200]
+    rows = results.select(metric="flow_stats/{pg_id}/rx_pkts/{port}", port=1)
+    assert list(rows["pg_id"]) == [11]
+    assert list(rows["value"]) == [3]
+    assert len(results.select(server="unknown")["value"]) == 0
+
+
+def test_integer_metrics_keep_type(tmp_path):
+    path = str(tmp_path / "stats.col")
+    save_columnar(STATISTICS, path)
+    stats = ColumnarResults(path).to_statistics()["t1"]["0"]["a"]
+    assert isinstance(stats["0"]["opackets"], int)
+    assert isinstance(stats["latency"]["11"]["latency"]["jitter"], int)
+    assert isinstance(stats["0"]["tx_pps"], float)
+
+
+def test_empty_statistics(tmp_path):
+    path = str(tmp_path / "stats.col")
+    save_columnar({}, path)
+    results = ColumnarResults(path)
+    assert len(results) == 0
+    assert results.to_statistics() == {}
+
+
+def test_json_conversion(tmp_path):
+    json_path = tmp_path / "stats.json"
+    json_path.write_text(json.dumps(STATISTICS))
+    json_to_columnar(str(json_path), str(tmp_path / "stats.col"))
+    columnar_to_json(str(tmp_path / "stats.col"), str(tmp_path / "back.json"))
+    assert json.loads((tmp_path / "back.json").read_text()) == STATISTICS
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "stats.json"
+    path.write_text("{}")
+    with pytest.raises(TrexTestDirectorError):
+        ColumnarResults(str(path))
@@ -0,0 +1,64 @@
+import gc
+
+from trextestdirector import compact_stats
+from trextestdirector.compact_stats import (
+    CompactStats,
+    parse_projection,
+    project_stats,
+)
+
+STATS = {
+    0: {"opackets": 10, "tx_pps": 1.5, "state": "up"},
+    1: {"opackets": 20, "tx_pps": None},
+    "global": {"cpu_util": 3.25, "queue_full": 0},
+    "latency": {11: {"latency": {"average": 4.0, "histogram": {"10": 2}}}},
+}
+
+
+def test_projection_keeps_matching_numeric_values():
+    projection = parse_projection(
+        ["*/opackets", "global/cpu_util", "latency/*/latency"]
+    )
+    stats = CompactStats(STATS, projection)
+    assert stats.to_dict() == {
+        0: {"opackets": 10},
+        1: {"opackets": 20},
+        "global": {"cpu_util": 3.25},
+        "latency": {11: {"latency": {"average": 4.0, "histogram": {"10": 2}}}},
+    }
+    assert list(stats.integers) == [10, 20, 2]
+    assert list(stats.floats) == [3.25, 4.0]
+
+
+def test_none_values_are_kept():
+    stats = CompactStats(STATS, parse_projection(["1"]))
+    assert stats.to_dict() == {1: {"opackets": 20, "tx_pps": None}}
+
+
+def test_booleans_and_large_integers_are_kept_unchanged():
+    stats = {0: {"is_up": True, "promiscuous": False, "bytes": 2**64, "low": -(2**70)}}
+    compact = CompactStats(stats, parse_projection(["0"]))
+    assert compact.to_dict() == stats
+    values = [value for _, value in compact.items()]
+    assert [type(value) for value in values] == [bool, bool, int, int]
+    assert list(compact.integers) == []
+    # the int64 boundaries still fit the typed array
+    limits = {0: {"max": 2**63 - 1, "min": -(2**63)}}
+    compact = CompactStats(limits, parse_projection(["0"]))
+    assert compact.to_dict() == limits
+    assert list(compact.integers) == [2**63 - 1, -(2**63)]
+
+
+def test_without_projection_stats_are_unchanged():
+    assert project_stats(STATS, []) is STATS
+
+
+def test_schemas_are_shared_and_released():
+    projection = parse_projection(["*/opackets"])
+    first = CompactStats(STATS, projection)
+    second = CompactStats({0: {"opackets": 1}, 1: {"opackets": 2}}, projection)
+    assert first.schema is second.schema
+    schemas = len(compact_stats._schemas)
+    del first, second
+    gc.collect()
+    assert len(compact_stats._schemas) == schemas - 1
@@ -0,0 +1,181 @@
+import threading
+import time
+import types
+
+from trextestdirector import daemon
+from trextestdirector.daemon import Director, _Job, submit_job
+
+
+class Client:
+    def __init__(self, server, hang=False):
+        self.ctx = types.SimpleNamespace(server=server, sync_port=4501)
+        self.hang = hang
+        self.calls = []
+
+    def is_connected(self):
+        return True
+
+    def reset(self):
+        self.calls.append("reset")
+        if self.hang:
+            time.sleep(5)
+
+    def release(self):
+        self.calls.append("release")
+
+    def disconnect(self):
+        self.calls.append("disconnect")
+
+
+class Scenario:
+    """Scenario running `iterations` of a single test without TRex."""
+
+    instances = []
+
+    def __init__(self, config):
+        self.servers = [
+            {"name": server["name"], "client": Client(server["management_ip"])}
+            for server in config["servers"]
+        ]
+        self.iterations = config["iterations"]
+        self.hung = config.get("hung", [])
+        self.iteration_callbacks = []
+        self.statistics = {}
+        self.stop_timeout = 1.0
+        Scenario.instances.append(self)
+
+    def _set_up(self):
+        pass
+
+    def run_tests(self):
+        for iteration in range(self.iterations):
+            stats = {"iteration": iteration}
+            self.statistics.setdefault("t", {})[iteration] = stats
+            for callback in self.iteration_callbacks:
+                callback("t", iteration, stats)
+
+    def _stop_traffic(self, timeout=None):
+        return self.hung
+
+
+def job(iterations=1, hung=(), servers=("10.0.0.1",)):
+    config = {
+        "servers": [
+            {"name": f"s{idx}", "management_ip": ip} for idx, ip in enumerate(servers)
+        ],
+        "iterations": iterations,
+        "hung": list(hung),
+    }
+    return _Job({"config": config, "scenario": "scenario.py"})
+
+
+def events(job):
+    result = []
+    while not job.events.empty():
+        result.append(job.events.get())
+    return result
+
+
+def director(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        daemon.TrexStlScenario, "load_trex_test_scenario", lambda _: Scenario
+    )
+    Scenario.instances = []
+    return Director(str(tmp_path / "socket"), shutdown_timeout=0.2)
+
+
+def test_jobs_are_queued(monkeypatch, tmp_path):
+    jobs = [job(), job()]
+    director_ = director(monkeypatch, tmp_path)
+    for queued in jobs:
+        director_.submit(queued)
+    assert [events(queued) for queued in jobs] == [
+        [{"event": "queued", "position": 1}],
+        [{"event": "queued", "position": 2}],
+    ]
+
+
+def test_iterations_are_streamed(monkeypatch, tmp_path):
+    queued = job(iterations=2)
+    director(monkeypatch, tmp_path)._run_job(queued)
+    assert events(queued) == [
+        {"event": "started"},
+        {
+            "event": "iteration",
+            "test": "t",
+            "iteration": 0,
+            "statistics": {"iteration": 0},
+        },
+        {
+            "event": "iteration",
+            "test": "t",
+            "iteration": 1,
+            "statistics": {"iteration": 1},
+        },
+        {
+            "event": "finished",
+            "statistics": {"t": {0: {"iteration": 0}, 1: {"iteration": 1}}},
+        },
+    ]
+
+
+def test_sessions_are_reused_between_jobs(monkeypatch, tmp_path):
+    director_ = director(monkeypatch, tmp_path)
+    director_._run_job(job(servers=["10.0.0.1"]))
+    director_._run_job(job(servers=["10.0.0.1", "10.0.0.2"]))
+    first, second = Scenario.instances
+    assert second.servers[0]["client"] is first.servers[0]["client"]
+    assert second.servers[1]["client"] is not first.servers[0]["client"]
+    assert len(director_.sessions) == 2
+    # sessions are not closed between jobs
+    assert first.servers[0]["client"].calls == []
+
+
+def test_sessions_with_hung_stop_are_abandoned(monkeypatch, tmp_path):
+    director_ = director(monkeypatch, tmp_path)
+    director_._run_job(job(servers=["10.0.0.1", "10.0.0.2"], hung=["s1"]))
+    assert list(director_.sessions) == [("10.0.0.1", 4501)]
+
+
+def test_shut_down_is_bounded(monkeypatch, tmp_path):
+    director_ = director(monkeypatch, tmp_path)
+    clients = [Client("10.0.0.1"), Client("10.0.0.2", hang=True)]
+    for client in clients:
+        director_.sessions[(client.ctx.server, client.ctx.sync_port)] = client
+    started = time.monotonic()
+    director_._shut_down()
+    assert time.monotonic() - started < 2
+    assert clients[0].calls == ["reset", "release", "disconnect"]
+    assert clients[1].calls == ["reset"]
+
+
+def test_submitted_job_streams_events(monkeypatch, tmp_path):
+    director_ = director(monkeypatch, tmp_path)
+    server = daemon._JobServer(director_.socket_path, daemon._JobRequestHandler)
+    server.director = director_
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    received = []
+    submitter = threading.Thread(
+        target=lambda: received.extend(
+            submit_job(director_.socket_path, job(iterations=2).config)
+        ),
+        daemon=True,
+    )
+    try:
+        submitter.start()
+        director_._run_job(director_.jobs.get(timeout=5))
+        submitter.join(5)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert [event["event"] for event in received] == [
+        "queued",
+        "started",
+        "iteration",
+        "iteration",
+        "finished",
+    ]
+    # statistics keys are sent as JSON
+    assert received[-1]["statistics"] == {
+        "t": {"0": {"iteration": 0}, "1": {"iteration": 1}}
+    }
@@ -0,0 +1,130 @@
+import socket
+import threading
+
+import pytest
+
+from trextestdirector import distributed
+from trextestdirector.distributed import (
+    WorkerConnection,
+    _restore_stats_keys,
+    assign_workers,
+    serve,
+)
+from trextestdirector.errors import (
+    TrexTestDirectorError,
+    TrexTestDirectorInterruptError,
+)
+
+
+def test_assign_workers():
+    servers = [{"name": name} for name in ("a", "b", "c")]
+    assert assign_workers(servers, 2) == [
+        {"servers": ["a", "c"]},
+        {"servers": ["b"]},
+    ]
+    assert assign_workers(servers, 5) == [
+        {"servers": ["a"]},
+        {"servers": ["b"]},
+        {"servers": ["c"]},
+    ]
+
+
+def test_restore_stats_keys_converts_only_port_and_pg_id_levels():
+    stats = distributed._decode(
+        distributed._encode(
+            {
+                "0": {"opackets": 10},
+                "global": {"tx_pps": 1.0},
+                "flow_stats": {"11": {"tx_pkts": {"0": 10, "total": 10}}},
+                "latency": {"11": {"latency": {"histogram": {"20": 1, "10": 2}}}},
+            }
+        )
+    )
+    restored = _restore_stats_keys(stats)
+    assert restored[0] == {"opackets": 10}
+    assert restored["flow_stats"][11]["tx_pkts"] == {0: 10, "total": 10}
+    assert restored["latency"][11]["latency"]["histogram"] == {20: 1, 10: 2}
+
+
+def test_server_names_are_not_converted():
+    message = distributed._decode(distributed._encode({"1": {"0": {}}}))
+    assert message == {"1": {"0": {}}}
+    assert _restore_stats_keys(message["1"]) == {0: {}}
+
+
+def test_serve_requires_token_on_remote_address():
+    with pytest.raises(TrexTestDirectorError):
+        serve("0.0.0.0:0", once=True)
+
+
+def start_worker(token):
+    """Serve a single coordinator in a thread and return its address."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        address = "127.0.0.1:{}".format(probe.getsockname()[1])
+    server = threading.Thread(target=serve, args=(address, True, None, token))
+    server.daemon = True
+    server.start()
+    return server, address
+
+
+def connect(worker, server):
+    for _ in range(50):
+        try:
+            return worker.connect()
+        except ConnectionRefusedError:
+            server.join(0.1)
+    raise AssertionError("worker is not listening")
+
+
+@pytest.mark.parametrize("token, accepted", [("secret", True), ("other", False)])
+def test_worker_checks_token(token, accepted):
+    server, address = start_worker("secret")
+    worker = WorkerConnection(address, [], token=token)
+    if accepted:
+        connect(worker, server)
+        worker.close()
+    else:
+        with pytest.raises(TrexTestDirectorError):
+            connect(worker, server)
+    server.join(5)
+    assert not server.is_alive()
+
+
+def test_abort_runs_in_the_thread_of_interrupted_command(monkeypatch):
+    threads = {}
+
+    def wait(self):
+        threads["wait"] = threading.current_thread()
+        if self.aborted.wait(5):
+            raise TrexTestDirectorInterruptError
+
+    def abort(self):
+        threads["abort"] = threading.current_thread()
+        assert self.abort_args == {"stop_timeout": 1.0, "abort_timeout": 2.0}
+
+    monkeypatch.setattr(distributed.Worker, "wait", wait)
+    monkeypatch.setattr(distributed.Worker, "abort", abort)
+    server, address = start_worker("secret")
+    worker = WorkerConnection(address, [], token="secret")
+    connect(worker, server)
+
+    def call_wait():
+        # interrupted command gets no response
+        with pytest.raises(TrexTestDirectorError):
+            worker.call("wait")
+
+    waiting = threading.Thread(target=call_wait, daemon=True)
+    waiting.start()
+    while "wait" not in threads:
+        waiting.join(0.01)
+    worker.abort(1.0, 2.0)
+    server.join(5)
+    worker.close()
+    assert threads["abort"] is threads["wait"]
+
+
+def test_spawn_fails_when_worker_exits(monkeypatch):
+    monkeypatch.setattr(distributed.sys, "executable", "false")
+    with pytest.raises(TrexTestDirectorError):
+        WorkerConnection.spawn(["a"])
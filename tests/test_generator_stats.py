@@ -0,0 +1,80 @@
+import pytest
+
+from trextestdirector.generator_stats import GeneratorMonitor, requested_rates
+
+TRANSMIT = [
+    {"from": "a:0", "to": "b:0", "tunables": {"pps": 1000}},
+    {
+        "from": "a:1",
+        "to": "b:1",
+        "tunables": {"pps": 500, "flow_stats": "latency", "flow_stats_pps": 100},
+    },
+]
+
+
+def stats(queue_full=0, oerrors=0):
+    return {"a": {"global": {"queue_full": queue_full}, "total": {"oerrors": oerrors}}}
+
+
+def sample(cpu_util=10.0, rx_cpu_util=10.0, tx_pps=1600.0):
+    return {"cpu_util": cpu_util, "rx_cpu_util": rx_cpu_util, "tx_pps": tx_pps}
+
+
+def finish(samples, thresholds=None, **kwargs):
+    monitor = GeneratorMonitor(thresholds)
+    monitor.start()
+    monitor.add_samples({"a": samples})
+    return monitor.finish(stats(**kwargs), TRANSMIT)["a"]
+
+
+def test_requested_rates_include_flow_stats():
+    assert requested_rates(TRANSMIT) == {"a": 1600}
+
+
+def test_generator_within_thresholds():
+    generator = finish([sample(cpu_util=50), sample(cpu_util=70)])
+    assert generator["cpu_util_max"] == 70
+    assert generator["cpu_util_avg"] == 60
+    assert generator["samples"] == 2
+    assert generator["reasons"] == []
+    assert not generator["limited"]
+
+
+@pytest.mark.parametrize(
+    "samples, kwargs, reason",
+    [
+        ([sample(cpu_util=96)], {}, "cpu_util reached 96.0%"),
+        ([sample(rx_cpu_util=99.5)], {}, "rx_cpu_util reached 99.5%"),
+        ([sample()], {"queue_full": 3}, "TX queue full 3 times"),
+        ([sample()], {"oerrors": 2}, "2 TX errors"),
+        ([sample(tx_pps=1500)], {}, "achieved 1500 pps of requested 1600 pps"),
+    ],
+)
+def test_generator_is_limited(samples, kwargs, reason):
+    generator = finish(samples, **kwargs)
+    assert generator["reasons"] == [reason]
+    assert generator["limited"]
+
+
+def test_thresholds_can_be_changed():
+    samples = [sample(cpu_util=90, tx_pps=1560)]
+    assert not finish(samples)["limited"]
+    generator = finish(samples, {"cpu_util": 90, "rate_tolerance": 0.01})
+    assert generator["reasons"] == [
+        "cpu_util reached 90.0%",
+        "achieved 1560 pps of requested 1600 pps",
+    ]
+
+
+def test_idle_samples_are_skipped():
+    class Client:
+        def get_stats(self, ports):
+            return {"global": {"cpu_util": 99.0, "tx_pps": 0}}
+
+    monitor = GeneratorMonitor()
+    monitor.start()
+    monitor.sample([{"name": "a", "client": Client(), "ports": [{"id": 0}]}])
+    generator = monitor.finish(stats(), TRANSMIT)["a"]
+    assert generator["samples"] == 0
+    assert generator["cpu_util_max"] is None
+    assert not generator["limited"]
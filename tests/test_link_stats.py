@@ -0,0 +1,103 @@
+import pytest
+
+from trextestdirector.link_stats import compute_link_stats
+
+
+def port(opackets=0, ipackets=0, obytes=0, ibytes=0):
+    return {
+        "opackets": opackets,
+        "ipackets": ipackets,
+        "obytes": obytes,
+        "ibytes": ibytes,
+    }
+
+
+def test_link_counts_all_streams_and_reports_pg_id_separately():
+    transmit = [
+        {
+            "from": "transmitter:0",
+            "to": "receiver:0",
+            "tunables": {"flow_stats": "latency", "flow_stats_pg_id": 11},
+        }
+    ]
+    stats = {
+        "transmitter": {
+            0: port(opackets=11000, obytes=704000),
+            "flow_stats": {11: {"tx_pkts": {0: 1000}}},
+        },
+        "receiver": {
+            0: port(ipackets=10890, ibytes=696960),
+            "flow_stats": {11: {"rx_pkts": {0: 990}}},
+        },
+    }
+    link_stats = compute_link_stats(transmit, stats, duration=10)
+    link = link_stats["links"]["transmitter:0->receiver:0"]
+    assert link["tx_pkts"] == 11000
+    assert link["loss"] == 110
+    assert link["loss_ratio"] == pytest.approx(0.01)
+    assert link["tx_pps"] == 1100
+    assert link["rx_bps"] == 696960 * 8 / 10
+    assert link["flow_stats"] == {
+        "pg_id": 11,
+        "tx_pkts": 1000,
+        "rx_pkts": 990,
+        "loss": 10,
+        "loss_ratio": pytest.approx(0.01),
+    }
+    assert link_stats["aggregate"]["loss"] == 110
+
+
+def test_shared_receiver_port_is_counted_once():
+    transmit = [{"from": "a:0", "to": "c:0"}, {"from": "b:0", "to": "c:0"}]
+    stats = {
+        "a": {0: port(opackets=100)},
+        "b": {0: port(opackets=50)},
+        "c": {0: port(ipackets=145)},
+    }
+    link_stats = compute_link_stats(transmit, stats, duration=1)
+    for link in link_stats["links"].values():
+        assert link["shared_ports"]
+        assert link["rx_pkts"] is None
+        assert link["loss"] is None
+        assert link["rx_pps"] is None
+    assert link_stats["links"]["a:0->c:0"]["tx_pkts"] == 100
+    aggregate = link_stats["aggregate"]
+    assert (aggregate["tx_pkts"], aggregate["rx_pkts"]) == (150, 145)
+    assert aggregate["loss"] == 5
+
+
+def test_bidirectional_links():
+    transmit = [{"from": "a:0", "to": "a:1"}, {"from": "a:1", "to": "a:0"}]
+    stats = {"a": {"0": port(10, 8), "1": port(9, 9)}}
+    link_stats = compute_link_stats(transmit, stats)
+    assert link_stats["links"]["a:0->a:1"]["loss"] == 1
+    assert link_stats["links"]["a:1->a:0"]["loss"] == 1
+    assert not link_stats["links"]["a:0->a:1"]["shared_ports"]
+    assert link_stats["aggregate"]["loss"] == 2
+    assert link_stats["aggregate"]["tx_pps"] is None
+
+
+def test_rate_groups():
+    transmit = [
+        {"from": "a:0", "to": "c:0", "rate_group": "g", "rate_group_pps": 300},
+        {"from": "a:1", "to": "c:0", "rate_group": "g", "rate_group_pps": 300},
+    ]
+    stats = {"a": {0: port(opackets=100), 1: port(opackets=180)}, "c": {0: port()}}
+    rate_group = compute_link_stats(transmit, stats, duration=1)["rate_groups"]["g"]
+    assert rate_group["ports"] == ["a:0", "a:1"]
+    assert rate_group["achieved_pps"] == 280
+    assert rate_group["requested_pps"] == 300
+    assert rate_group["pg_ids"] == {}
+
+
+def test_rate_group_pg_ids():
+    tunables = {"flow_stats": "stats", "flow_stats_pg_id": 7}
+    transmit = [
+        {"from": "a:0", "to": "c:0", "rate_group": "g", "rate_group_pps": 300},
+        {"from": "a:1", "to": "c:0", "rate_group": "g", "rate_group_pps": 300},
+    ]
+    for idx, tx_config in enumerate(transmit):
+        tx_config["tunables"] = {**tunables, "flow_stats_pg_id": 7 + idx}
+    stats = {"a": {0: port(), 1: port()}, "c": {0: port()}}
+    rate_group = compute_link_stats(transmit, stats, duration=1)["rate_groups"]["g"]
+    assert rate_group["pg_ids"] == {"a:0->c:0": 7, "a:1->c:0": 8}
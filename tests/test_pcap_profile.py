@@ -0,0 +1,167 @@
+import socket
+import struct
+
+import pytest
+
+from trextestdirector import pcap_profile
+from trextestdirector.pcap_profile import (
+    PcapReplayProfile,
+    _checksum,
+    read_pcap,
+    rewrite_ipv4,
+)
+
+SRC = "10.0.0.1"
+DST = "10.0.0.2"
+
+
+def l4_segment(protocol, body, src=SRC, dst=DST, checksum=True):
+    if protocol == 17:
+        segment = bytearray(struct.pack("!HHHH", 1000, 2000, 8 + len(body), 0) + body)
+        offset = 6
+    else:
+        segment = bytearray(
+            struct.pack("!HHIIBBHHH", 1000, 2000, 1, 0, 0x50, 2, 100, 0, 0) + body
+        )
+        offset = 16
+    if checksum:
+        value = _checksum(pseudo_header(protocol, src, dst, segment) + bytes(segment))
+        struct.pack_into("!H", segment, offset, value or 0xFFFF)
+    return bytes(segment)
+
+
+def pseudo_header(protocol, src, dst, segment):
+    addresses = socket.inet_aton(src) + socket.inet_aton(dst)
+    return addresses + struct.pack("!BBH", 0, protocol, len(segment))
+
+
+def ipv4_frame(protocol, segment, src=SRC, dst=DST, vlan=False):
+    header = bytearray(
+        struct.pack(
+            "!BBHHHBBH4s4s",
+            0x45,
+            0,
+            20 + len(segment),
+            1,
+            0,
+            64,
+            protocol,
+            0,
+            socket.inet_aton(src),
+            socket.inet_aton(dst),
+        )
+    )
+    struct.pack_into("!H", header, 10, _checksum(bytes(header)))
+    ethernet = b"\0" * 12 + (b"\x81\x00\x00\x05" if vlan else b"") + b"\x08\x00"
+    return ethernet + bytes(header) + segment
+
+
+def write_pcap(path, frames, byte_order="<", nanoseconds=False):
+    magic, resolution = (0xA1B23C4D, 10**9) if nanoseconds else (0xA1B2C3D4, 10**6)
+    with open(path, "wb") as pcap:
+        pcap.write(struct.pack(f"{byte_order}IHHiIII", magic, 2, 4, 0, 0, 65535, 1))
+        for idx, frame in enumerate(frames):
+            # frames are 1 ms apart
+            fraction = idx * resolution // 1000
+            pcap.write(
+                struct.pack(f"{byte_order}IIII", 100, fraction, len(frame), len(frame))
+            )
+            pcap.write(frame)
+    return str(path)
+
+
+@pytest.mark.parametrize("protocol", [6, 17])
+@pytest.mark.parametrize("vlan", [False, True])
+def test_rewrite_keeps_checksums_valid(protocol, vlan):
+    segment = l4_segment(protocol, b"payload")
+    frame = ipv4_frame(protocol, segment, vlan=vlan)
+    new_src, new_dst = "192.168.1.1", "172.16.0.9"
+    rewritten = rewrite_ipv4(
+        frame, socket.inet_aton(new_src), socket.inet_aton(new_dst)
+    )
+    l3_offset = 18 if vlan else 14
+    header = rewritten[l3_offset : l3_offset + 20]
+    assert header[12:20] == socket.inet_aton(new_src) + socket.inet_aton(new_dst)
+    assert _checksum(header) == 0
+    segment = rewritten[l3_offset + 20 :]
+    assert _checksum(pseudo_header(protocol, new_src, new_dst, segment) + segment) == 0
+
+
+def test_rewrite_keeps_unused_udp_checksum():
+    frame = ipv4_frame(17, l4_segment(17, b"x", checksum=False))
+    rewritten = rewrite_ipv4(frame, socket.inet_aton("1.1.1.1"))
+    assert rewritten[14 + 20 + 6 : 14 + 20 + 8] == b"\0\0"
+    assert rewritten[14 + 16 : 14 + 20] == socket.inet_aton(DST)
+
+
+def test_rewrite_skips_frames_other_than_ipv4():
+    frame = b"\0" * 12 + b"\x86\xdd" + b"x" * 40
+    assert rewrite_ipv4(frame, socket.inet_aton("1.1.1.1")) == frame
+
+
+@pytest.mark.parametrize("byte_order", ["<", ">"])
+@pytest.mark.parametrize("nanoseconds", [False, True])
+def test_read_pcap(tmp_path, byte_order, nanoseconds):
+    frames = [b"a" * 60, b"b" * 60, b"c" * 60]
+    path = write_pcap(tmp_path / "test.pcap", frames, byte_order, nanoseconds)
+    records = list(read_pcap(path))
+    assert [bytes(frame) for _, frame in records] == frames
+    assert [timestamp for timestamp, _ in records] == pytest.approx(
+        [100.0, 100.001, 100.002]
+    )
+    assert len(list(read_pcap(path, max_packets=2))) == 2
+
+
+def test_read_pcap_rejects_pcapng(tmp_path):
+    path = tmp_path / "test.pcapng"
+    path.write_bytes(b"\x0a\x0d\x0d\x0a" + b"\0" * 40)
+    with pytest.raises(Exception, match="pcapng"):
+        list(read_pcap(str(path)))
+
+
+class Recorder:
+    def __init__(self, *args, **kwargs):
+        self.kwargs = kwargs
+
+
+@pytest.fixture
+def profile(monkeypatch):
+    for name in ("STLPktBuilder", "STLStream", "STLTXSingleBurst"):
+        monkeypatch.setattr(pcap_profile, name, type(name, (Recorder,), {}))
+    return PcapReplayProfile()
+
+
+@pytest.mark.parametrize(
+    "loop_count, last_stream",
+    [
+        (1, {}),
+        (3, {"next": "pcap_0", "action_count": 2}),
+        # TRex loops until traffic is stopped
+        (0, {"next": "pcap_0", "action_count": 0}),
+    ],
+)
+def test_streams_are_chained(tmp_path, profile, loop_count, last_stream):
+    frame_a = ipv4_frame(17, l4_segment(17, b"a"))
+    frame_b = ipv4_frame(17, l4_segment(17, b"b"))
+    path = write_pcap(tmp_path / "test.pcap", [frame_a, frame_a, frame_b, frame_a])
+    streams = profile.get_streams(pcap_file=path, loop_count=loop_count)
+    # runs of identical frames are sent as one burst
+    bursts = [stream.kwargs["mode"].kwargs["total_pkts"] for stream in streams]
+    assert bursts == [2, 1, 1]
+    assert [stream.kwargs["next"] for stream in streams[:-1]] == ["pcap_1", "pcap_2"]
+    assert [stream.kwargs["self_start"] for stream in streams] == [True, False, False]
+    assert streams[0].kwargs["packet"] is streams[2].kwargs["packet"]
+    assert streams[1].kwargs["isg"] == pytest.approx(1000)
+    last = streams[-1].kwargs
+    assert {
+        key: last[key] for key in ("next", "action_count") if key in last
+    } == last_stream
+
+
+def test_fixed_rate_replaces_capture_timing(tmp_path, profile):
+    frames = [ipv4_frame(17, l4_segment(17, bytes([idx]))) for idx in range(3)]
+    path = write_pcap(tmp_path / "test.pcap", frames)
+    streams = profile.get_streams(pcap_file=path, pps=1000, src_ip="9.9.9.9")
+    assert [stream.kwargs["isg"] for stream in streams] == [0, 1000, 1000]
+    packet = streams[0].kwargs["packet"].kwargs["pkt_buffer"]
+    assert packet[14 + 12 : 14 + 16] == socket.inet_aton("9.9.9.9")
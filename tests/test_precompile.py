@@ -0,0 +1,97 @@
+import os
+
+from trextestdirector.precompile import (
+    PrecompiledProfiles,
+    _CompileScenario,
+    compile_profiles,
+    profile_key,
+)
+
+
+def write_profile(directory):
+    profile = directory / "profile.py"
+    profile.write_text("import helper\n")
+    (directory / "helper.py").write_text("PPS = 1\n")
+    (directory / "capture.pcap").write_bytes(b"\x01")
+    return str(profile)
+
+
+def modify(path, content):
+    """Write content and move modification time as an edit later would."""
+    stat = os.stat(path)
+    path.write_bytes(content)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_key_depends_on_tunables_and_port(tmp_path):
+    profile = write_profile(tmp_path)
+    key = profile_key(profile, {"pps": 1}, 0)
+    assert key == profile_key(profile, {"pps": 1}, 0)
+    assert key != profile_key(profile, {"pps": 2}, 0)
+    assert key != profile_key(profile, {"pps": 1}, 1)
+
+
+def test_key_depends_on_imported_modules(tmp_path):
+    profile = write_profile(tmp_path)
+    key = profile_key(profile, {}, 0)
+    modify(tmp_path / "helper.py", b"PPS = 2\n")
+    assert key != profile_key(profile, {}, 0)
+
+
+def test_key_depends_on_files_named_by_tunables(tmp_path):
+    profile = write_profile(tmp_path)
+    tunables = {"pcap_file": str(tmp_path / "capture.pcap")}
+    key = profile_key(profile, tunables, 0)
+    modify(tmp_path / "capture.pcap", b"\x02")
+    assert key != profile_key(profile, tunables, 0)
+
+
+def test_key_of_a_file_changed_in_place_is_recomputed(tmp_path):
+    profile = write_profile(tmp_path)
+    tunables = {"pcap_file": str(tmp_path / "capture.pcap")}
+    key = profile_key(profile, tunables, 0)
+    # same size, different content
+    modify(tmp_path / "capture.pcap", b"\x03")
+    assert key != profile_key(profile, tunables, 0)
+
+
+def test_compiled_profiles_are_loaded(tmp_path):
+    config = {
+        "servers": [
+            {
+                "name": name,
+                "management_ip": ip,
+                "ports": [
+                    {"id": 0, "ip": f"10.0.{idx}.1", "default_gateway": "10.0.9.1"},
+                    {"id": 1, "ip": f"10.1.{idx}.1", "default_gateway": "10.1.9.1"},
+                ],
+            }
+            for idx, (name, ip) in enumerate([("a", "127.0.0.1"), ("b", "127.0.0.2")])
+        ],
+        "tests": [
+            {
+                "name": "t",
+                "transmit": [
+                    {"from": "a:*", "to": "b:0", "total_pps": 3000, "flows": 10}
+                ],
+            }
+        ],
+    }
+    artifact = str(tmp_path / "compiled.json")
+    compile_profiles(config, artifact)
+    precompiled = PrecompiledProfiles(artifact)
+    assert precompiled.get_rate_weights("t", "a:*->b:0") == [1, 1]
+    scenario = _CompileScenario(config)
+    scenario.transmit = scenario._resolve_transmit(scenario.tests[0])
+    plan = scenario._plan_traffic_profiles(scenario.tests[0])
+    for (_, port_id), streams in plan.items():
+        for _, profile_file, tunables in streams:
+            loaded = precompiled.get_streams(profile_file, tunables, port_id)
+            assert loaded
+            compiled = scenario._get_streams(
+                ("profile", profile_file, tunables), port_id
+            )
+            assert [stream.to_json() for stream in loaded] == [
+                stream.to_json() for stream in compiled
+            ]
+    assert precompiled.get_streams(profile_file, {**tunables, "pps": 1}, 0) is None
@@ -0,0 +1,115 @@
+import struct
+
+import pytest
+
+numpy = pytest.importorskip("numpy")
+
+from trextestdirector.rx_capture import RxCapture, analyze, decode_packets
+
+
+def packet(ts, seq=None):
+    binary = b"\0" * 4 + (struct.pack(">I", seq) if seq is not None else b"")
+    return {"ts": ts, "binary": binary}
+
+
+class Port:
+    def __init__(self, service_mode):
+        self.service_mode = service_mode
+
+    def is_service_mode_on(self):
+        return self.service_mode
+
+
+class Client:
+    """Client capturing `packets` on each port."""
+
+    def __init__(self, packets, service_mode=(), fail_start=False):
+        self.packets = packets
+        self.ports = {port_id: Port(port_id in service_mode) for port_id in (0, 1)}
+        self.fail_start = fail_start
+        self.captures = {}
+        self.stopped = []
+
+    def get_port(self, port_id):
+        return self.ports[port_id]
+
+    def set_service_mode(self, ports, enabled=True):
+        for port_id in ports:
+            self.ports[port_id].service_mode = enabled
+
+    def start_capture(self, rx_ports, limit, mode, bpf_filter):
+        assert all(self.ports[port_id].service_mode for port_id in rx_ports)
+        if self.fail_start and self.captures:
+            raise RuntimeError("capture failed")
+        capture_id = len(self.captures) + 1
+        self.captures[capture_id] = list(self.packets)
+        return {"id": capture_id}
+
+    def fetch_capture_packets(self, capture_id, packets, count):
+        packets.extend(self.captures[capture_id][:count])
+        self.captures[capture_id] = self.captures[capture_id][count:]
+
+    def stop_capture(self, capture_id):
+        self.stopped.append(capture_id)
+
+
+def test_decode_packets_skips_packets_without_sequence_number():
+    packets = [packet(1.0, 7), packet(2.0), packet(3.0, 8)]
+    timestamps, sequence = decode_packets(packets, seq_offset=4, seq_size=4)
+    assert list(timestamps) == [1.0, 3.0]
+    assert list(sequence) == [7, 8]
+    timestamps, sequence = decode_packets(packets)
+    assert list(timestamps) == [1.0, 2.0, 3.0]
+    assert sequence is None
+
+
+def test_analyze_bursts_and_jitter():
+    # two bursts of packets 1 us apart separated by 100 us
+    timestamps = numpy.array([0, 1, 2, 102, 103]) * 1e-6
+    analysis = analyze(timestamps, burst_gap_us=10, percentiles=[50])
+    assert analysis["packets"] == 5
+    assert analysis["bursts"] == 2
+    assert analysis["burst_length"]["min"] == 2
+    assert analysis["burst_length"]["max"] == 3
+    assert analysis["inter_arrival_us"]["max"] == pytest.approx(100)
+    assert analysis["jitter_us"]["max"] == pytest.approx(99)
+    assert "reordered" not in analysis
+
+
+def test_analyze_sequence():
+    sequence = numpy.array([1, 2, 5, 3, 3, 4, 7])
+    analysis = analyze(numpy.arange(len(sequence)) * 1e-6, sequence)
+    assert analysis["duplicates"] == 1
+    assert analysis["missing"] == 1
+    # 3 and 4 arrive after 5, the duplicated 3 is not counted again
+    assert analysis["reordered"] == 2
+    assert analysis["reorder_depth"]["max"] == 2
+
+
+def test_analyze_empty_capture():
+    analysis = analyze(numpy.empty(0), numpy.empty(0, dtype="i8"))
+    assert analysis["packets"] == 0
+    assert analysis["bursts"] == 0
+    assert analysis["inter_arrival_us"] is None
+    assert analysis["missing"] == 0
+
+
+def test_service_mode_is_enabled_only_for_the_capture():
+    client = Client([packet(idx * 1e-6, idx) for idx in range(10)], service_mode=[1])
+    capture = RxCapture({"seq_offset": 4}, ["a:0", "a:1"])
+    capture.start([{"name": "a", "client": client}])
+    results = capture.finish()
+    assert [results[port]["packets"] for port in ("a:0", "a:1")] == [10, 10]
+    assert client.stopped == [1, 2]
+    assert not client.ports[0].service_mode
+    assert client.ports[1].service_mode
+
+
+def test_service_mode_is_restored_when_capture_fails_to_start():
+    client = Client([], fail_start=True)
+    capture = RxCapture({}, ["a:0", "a:1"])
+    with pytest.raises(RuntimeError):
+        capture.start([{"name": "a", "client": client}])
+    assert client.stopped == [1]
+    assert not client.ports[0].service_mode
+    assert not client.ports[1].service_mode
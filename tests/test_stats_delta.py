@@ -0,0 +1,37 @@
+from trextestdirector.stats_delta import delta_stats
+
+
+def test_counters_are_subtracted_and_other_values_taken_from_end():
+    start = {
+        0: {"opackets": 100, "obytes": 6400, "tx_pps": 10.0},
+        "global": {"cpu_util": 5.0, "queue_full": 3},
+        "flow_stats": {11: {"tx_pkts": {0: 50, "total": 50}}},
+        "latency": {11: {"err_cntrs": {"dropped": 1}, "latency": {"average": 7.0}}},
+    }
+    end = {
+        0: {"opackets": 250, "obytes": 16000, "tx_pps": 15.0},
+        "global": {"cpu_util": 9.0, "queue_full": 3},
+        "flow_stats": {11: {"tx_pkts": {0: 80, "total": 80}}},
+        "latency": {11: {"err_cntrs": {"dropped": 4}, "latency": {"average": 6.0}}},
+    }
+    assert delta_stats(start, end) == {
+        0: {"opackets": 150, "obytes": 9600, "tx_pps": 15.0},
+        "global": {"cpu_util": 9.0, "queue_full": 0},
+        "flow_stats": {11: {"tx_pkts": {0: 30, "total": 30}}},
+        "latency": {11: {"err_cntrs": {"dropped": 3}, "latency": {"average": 6.0}}},
+    }
+
+
+def test_values_missing_in_start_are_kept():
+    end = {1: {"opackets": 10, "state": "up", "flag": True}}
+    assert delta_stats({}, end) == end
+    assert delta_stats({1: {"opackets": None}}, end) == end
+
+
+def test_end_snapshot_is_not_modified_and_leaves_are_reused():
+    histogram = [1, 2]
+    end = {"latency": {1: {"latency": {"histogram_list": histogram}}}}
+    delta = delta_stats({}, end)
+    assert delta == end
+    assert delta is not end
+    assert delta["latency"][1]["latency"]["histogram_list"] is histogram
@@ -0,0 +1,90 @@
+import io
+import json
+import os
+
+import pytest
+
+from trextestdirector import tracing
+from trextestdirector.tracing import Tracer
+
+
+@pytest.fixture
+def tracer():
+    tracer = Tracer()
+    tracer.enable()
+    return tracer
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer()
+    with tracer.span("connect", server="a") as span:
+        pass
+    assert span is tracing._null_span
+    assert tracer.spans == []
+
+
+def test_nested_spans_and_tags(tracer):
+    with tracer.span("outer", test="t"):
+        with tracer.tagged(iteration=1):
+            with tracer.span("inner", server="a"):
+                pass
+        with tracer.span("after"):
+            pass
+    names = [span[0] for span in tracer.spans]
+    # spans are recorded when they end
+    assert names == ["inner", "after", "outer"]
+    tags = {span[0]: span[5] for span in tracer.spans}
+    assert tags == {
+        "inner": {"iteration": 1, "server": "a"},
+        "after": {},
+        "outer": {"test": "t"},
+    }
+    inner, _, outer = tracer.spans
+    assert outer[1] <= inner[1]
+    assert inner[1] + inner[2] <= outer[1] + outer[2]
+
+
+def test_chrome_trace(tracer, tmp_path):
+    with tracer.span("traffic", iteration=2):
+        pass
+    path = str(tmp_path / "trace.json")
+    tracer.save(path)
+    with open(path) as file_handler:
+        trace = json.load(file_handler)
+    (event,) = trace["traceEvents"]
+    assert event["name"] == "traffic"
+    assert event["ph"] == "X"
+    assert event["pid"] == os.getpid()
+    assert event["args"] == {"iteration": "2"}
+    assert event["dur"] >= 0
+    assert trace["displayTimeUnit"] == "ms"
+
+
+def test_summary(tracer):
+    tracer.record("fetch", 0.0, 1.0, {})
+    tracer.record("fetch", 1.0, 3.0, {})
+    tracer.record("render", 4.0, 0.5, {})
+    summary = tracer.summary()
+    assert list(summary) == ["fetch", "render"]
+    assert summary["fetch"] == {"count": 2, "total": 4.0, "avg": 2.0, "max": 3.0}
+    buffer = io.StringIO()
+    tracer.print_summary(buffer)
+    lines = buffer.getvalue().splitlines()
+    assert lines[0].split()[0] == "phase"
+    assert lines[1].split() == ["fetch", "2", "4.000", "2.000", "3.000"]
+
+
+def test_spans_of_other_process_are_merged(tracer):
+    worker = Tracer()
+    worker.enable()
+    with worker.tagged(test="t"):
+        with worker.span("stats_fetch"):
+            pass
+    spans = json.loads(json.dumps(worker.export_spans()))
+    assert worker.spans == []
+    tracer.add_spans(spans)
+    (span,) = tracer.spans
+    assert span[0] == "stats_fetch"
+    assert span[5] == {"test": "t"}
+    # start is translated through wall-clock time
+    assert span[1] + tracer._epoch == pytest.approx(spans[0]["start"])
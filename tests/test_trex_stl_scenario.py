@@ -0,0 +1,139 @@
+import threading
+
+import pytest
+
+from trextestdirector.errors import TrexTestDirectorConfigError
+from trextestdirector.trex_stl_scenario import TrexStlScenario
+
+SPEEDS = {("a", "0"): 10e9, ("a", "1"): 20e9}
+
+
+class Scenario(TrexStlScenario):
+    """Scenario which does not connect to servers."""
+
+    def _get_port_speed(self, server_name, port_id):
+        return SPEEDS.get((server_name, str(port_id)))
+
+    def test(self):
+        pass
+
+
+def config(transmit):
+    return {
+        "servers": [
+            {
+                "name": "a",
+                "management_ip": "127.0.0.1",
+                "ports": [
+                    {"id": 0, "ip": "10.0.0.1", "default_gateway": "10.0.0.2"},
+                    {"id": 1, "ip": "10.0.1.1", "default_gateway": "10.0.1.2"},
+                ],
+            },
+            {
+                "name": "b",
+                "management_ip": "127.0.0.2",
+                "ports": [{"id": 0, "ip": "10.0.0.2", "default_gateway": "10.0.0.1"}],
+            },
+        ],
+        "tests": [{"name": "t", "transmit": transmit}],
+    }
+
+
+def test_total_rate_is_split_by_port_speed():
+    transmit = [{"from": "a:*", "to": "b:0", "total_pps": 3000, "flows": 10}]
+    scenario = Scenario(config(transmit))
+    resolved = scenario._resolve_transmit(scenario.tests[0])
+    assert [entry["from"] for entry in resolved] == ["a:0", "a:1"]
+    assert [entry["to"] for entry in resolved] == ["b:0", "b:0"]
+    assert [entry["tunables"]["pps"] for entry in resolved] == [1000, 2000]
+    assert [
+        (entry["tunables"]["flow_offset"], entry["tunables"]["flow_count"])
+        for entry in resolved
+    ] == [(0, 4), (4, 6)]
+    assert all("total_pps" not in entry for entry in resolved)
+    assert resolved[0]["rate_group"] == "a:*->b:0"
+
+
+def test_streams_are_planned_for_resolved_transmit():
+    transmit = [
+        {
+            "from": ["a:0", "a:1"],
+            "to": "b:0",
+            "total_pps": 3000,
+            "tunables": {"flow_stats": "stats", "flow_stats_pg_id": 5},
+        }
+    ]
+    scenario = Scenario(config(transmit))
+    scenario.transmit = scenario._resolve_transmit(scenario.tests[0])
+    # speeds are not read again while planning streams
+    SPEEDS[("a", "1")] = 10e9
+    try:
+        plan = scenario._plan_traffic_profiles(scenario.tests[0])
+    finally:
+        SPEEDS[("a", "1")] = 20e9
+    tunables = [plan[("a", port_id)][0][2] for port_id in (0, 1)]
+    assert [tunable["pps"] for tunable in tunables] == [1000, 2000]
+    assert tunables[0]["src_ip"] == "10.0.0.1"
+    assert tunables[0]["dst_ip"] == "10.0.0.2"
+    # every split link has its own pg_id
+    assert [tunable["flow_stats_pg_id"] for tunable in tunables] == [5, 6]
+    assert plan[("b", 0)] == [("flow_stats", "stats", 5), ("flow_stats", "stats", 6)]
+
+
+def test_pg_ids_of_split_links_must_not_collide():
+    transmit = [
+        {
+            "from": "a:*",
+            "to": "b:0",
+            "tunables": {"flow_stats": "latency", "flow_stats_pg_id": 5},
+        },
+        {
+            "from": "b:0",
+            "to": "a:0",
+            "tunables": {"flow_stats": "latency", "flow_stats_pg_id": 6},
+        },
+    ]
+    scenario = Scenario(config(transmit))
+    with pytest.raises(TrexTestDirectorConfigError):
+        scenario._resolve_transmit(scenario.tests[0])
+
+
+class HungClient:
+    """Client whose stop never returns until released."""
+
+    def __init__(self, hung):
+        self.hung = hung
+        self.release_stop = threading.Event()
+        self.calls = []
+
+    def is_connected(self):
+        return True
+
+    def stop(self):
+        self.calls.append("stop")
+        if self.hung:
+            self.release_stop.wait(5)
+
+    def reset(self):
+        self.calls.append("reset")
+
+    def release(self):
+        self.calls.append("release")
+
+    def disconnect(self):
+        self.calls.append("disconnect")
+
+
+def test_abort_abandons_servers_which_did_not_stop():
+    scenario = Scenario(config([{"from": "a:0", "to": "b:0"}]))
+    scenario.stop_timeout = 0.1
+    scenario.abort_timeout = 1.0
+    clients = {"a": HungClient(True), "b": HungClient(False)}
+    for server in scenario.servers:
+        server["client"] = clients[server["name"]]
+    try:
+        scenario._abort()
+    finally:
+        clients["a"].release_stop.set()
+    assert clients["a"].calls == ["stop"]
+    assert clients["b"].calls == ["stop", "reset", "release", "disconnect"]
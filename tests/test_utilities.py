@@ -0,0 +1,141 @@
+import types
+
+import pytest
+
+from trextestdirector.errors import TrexTestDirectorConfigError
+from trextestdirector.utilities import (
+    diff_port_state,
+    distribute,
+    distribute_flows,
+    expand_test_matrix,
+    iter_tests,
+    validate_matrix_config,
+    validate_tests_config,
+)
+
+PORT = {
+    "id": 0,
+    "ip": "10.0.0.1",
+    "default_gateway": "10.0.0.2",
+    "service_mode": False,
+    "attributes": {},
+}
+
+
+def port_attr(promiscuous=False, src="10.0.0.1", state="resolved"):
+    return {
+        "layer_cfg": {"ipv4": {"state": state, "src": src, "dst": "10.0.0.2"}},
+        "promiscuous": {"enabled": promiscuous},
+        "link": {"up": True},
+    }
+
+
+def test_port_already_set_up():
+    assert diff_port_state(PORT, port_attr(), False) is None
+
+
+def test_l3_and_service_mode_changes():
+    changes = diff_port_state(PORT, port_attr(src="10.0.0.9"), True)
+    assert changes == {"l3": True, "service_mode": True, "attributes": {}}
+    changes = diff_port_state(PORT, port_attr(state="unresolved"), False)
+    assert changes["l3"]
+
+
+def test_configured_attributes_are_compared():
+    port = {**PORT, "attributes": {"promiscuous": True, "link_up": True}}
+    assert diff_port_state(port, port_attr(promiscuous=True), False) is None
+    changes = diff_port_state(port, port_attr(), False)
+    assert changes["attributes"] == {"promiscuous": True}
+
+
+def test_unreadable_attributes_are_always_applied():
+    port = {**PORT, "attributes": {"flow_ctrl": 0, "led_on": True}}
+    changes = diff_port_state(port, port_attr(), False)
+    assert changes["attributes"] == {"flow_ctrl": 0, "led_on": True}
+
+
+def test_unspecified_attributes_are_reset_to_defaults():
+    changes = diff_port_state(PORT, port_attr(promiscuous=True), False)
+    assert changes == {
+        "l3": False,
+        "service_mode": False,
+        "attributes": {"promiscuous": False},
+    }
+    # ports not reporting an attribute are left alone
+    attr = port_attr()
+    del attr["promiscuous"]
+    assert diff_port_state(PORT, attr, False) is None
+
+
+MATRIX_TEST = {
+    "name": "rfc2544",
+    "duration": 10,
+    "matrix": {"pkt_size": [64, 128], "pps": [1000, 2000]},
+    "transmit": [
+        {"from": "a:0", "to": "b:0", "tunables": {"pkt_size": 1500, "pg_id": 1}},
+        {"from": "a:1", "to": "b:1"},
+    ],
+}
+
+
+def test_matrix_expands_every_point_in_order():
+    tests = list(expand_test_matrix(MATRIX_TEST))
+    assert [test["name"] for test in tests] == [
+        "rfc2544[pkt_size=64,pps=1000]",
+        "rfc2544[pkt_size=64,pps=2000]",
+        "rfc2544[pkt_size=128,pps=1000]",
+        "rfc2544[pkt_size=128,pps=2000]",
+    ]
+    test = tests[1]
+    assert "matrix" not in test
+    assert test["matrix_name"] == "rfc2544"
+    assert test["duration"] == 10
+    assert test["transmit"][0]["tunables"] == {"pkt_size": 64, "pg_id": 1, "pps": 2000}
+    assert test["transmit"][1]["tunables"] == {"pkt_size": 64, "pps": 2000}
+    # source configuration is not modified
+    assert MATRIX_TEST["transmit"][0]["tunables"]["pkt_size"] == 1500
+
+
+def test_tests_are_expanded_lazily():
+    tests = iter_tests([{"name": "plain"}, MATRIX_TEST])
+    assert isinstance(tests, types.GeneratorType)
+    assert next(tests) == {"name": "plain"}
+    assert next(tests)["name"] == "rfc2544[pkt_size=64,pps=1000]"
+
+
+@pytest.mark.parametrize(
+    "tests",
+    [
+        # repeated matrix value
+        [{**MATRIX_TEST, "matrix": {"pps": [1000, 1000]}}],
+        # generated name of an explicit test
+        [MATRIX_TEST, {"name": "rfc2544[pkt_size=64,pps=1000]"}],
+        # values with the same text
+        [{**MATRIX_TEST, "matrix": {"pps": [1000, "1000"]}}],
+    ],
+)
+def test_repeated_test_names_are_rejected(tests):
+    with pytest.raises(TrexTestDirectorConfigError):
+        list(iter_tests(tests))
+    for test in tests:
+        test.setdefault("transmit", [])
+    with pytest.raises(TrexTestDirectorConfigError):
+        validate_tests_config(tests, [])
+
+
+@pytest.mark.parametrize("matrix", [{}, [1], {"pps": []}, {"pps": 1000}])
+def test_invalid_matrix_is_rejected(matrix):
+    with pytest.raises(TrexTestDirectorConfigError):
+        validate_matrix_config({"name": "t", "matrix": matrix})
+
+
+def test_rate_is_distributed_by_weights():
+    assert distribute(3000, [10e9, 20e9]) == [1000, 2000]
+    assert distribute(100, [1, 1, 1, 1]) == [25, 25, 25, 25]
+
+
+def test_flows_are_split_into_disjoint_ranges():
+    assert distribute_flows(10, [1, 1, 1]) == [(0, 4), (4, 3), (7, 3)]
+    assert distribute_flows(9, [1, 2]) == [(0, 3), (3, 6)]
+    assert distribute_flows(2, [1, 1, 1]) == [(0, 1), (1, 1), (2, 0)]
+    assert distribute_flows(0, [1, 1]) == [(0, 0), (0, 0)]
@@ -2,8 +2,15 @@
 import argparse
 import logging
 import os
+import sys
 
+from trextestdirector.checkpoint import Checkpoint
+from trextestdirector.columnar import save_columnar
+from trextestdirector.daemon import submit_job
+from trextestdirector.distributed import assign_workers, distributed_scenario
+from trextestdirector.precompile import PrecompiledProfiles, compile_profiles
 from trextestdirector.trex_stl_scenario import TrexStlScenario
+from trextestdirector.tracing import tracer
 from trextestdirector.utilities import load_config, set_up_logging, save_results_to_file
 
 logger = logging.getLogger(__name__)
@@ -25,7 +32,70 @@ def parse_args():
     parser.add_argument(
         "-o", "--output_file", help="path to file where statistics will be saved"
     )
+    parser.add_argument(
+        "--output_format",
+        choices=["json", "columnar"],
+        default="json",
+        help="format of the output file",
+    )
+    parser.add_argument(
+        "-c",
+        "--checkpoint_file",
+        help="path to file where progress of the test campaign will be saved",
+    )
+    parser.add_argument(
+        "-r",
+        "--resume",
+        action="store_true",
+        help="resume test campaign from the checkpoint file",
+    )
+    parser.add_argument(
+        "-f",
+        "--force_reset",
+        action="store_true",
+        help="reset and set up ports from scratch even if they are already set up",
+    )
+    parser.add_argument(
+        "-d",
+        "--daemon_socket",
+        help="path to a socket of TRex Test Director daemon which will run the test",
+    )
+    parser.add_argument(
+        "-t",
+        "--trace_file",
+        help="path to file where timing of test phases will be saved",
+    )
+    parser.add_argument(
+        "--cumulative_stats",
+        action="store_true",
+        help="save also cumulative stats besides per-iteration stats",
+    )
+    parser.add_argument(
+        "-p",
+        "--precompiled",
+        help="path to precompiled traffic profiles created with compile command",
+    )
+    parser.add_argument(
+        "--abort_timeout",
+        type=float,
+        default=10.0,
+        help="deadline [s] of stopping traffic and tearing down on Ctrl-C",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        help="number of local worker processes among which servers are split",
+    )
     args = parser.parse_args()
+    if args.daemon_socket and args.workers:
+        parser.error("--workers cannot be used with --daemon_socket")
+    if args.daemon_socket and args.checkpoint_file:
+        parser.error("--checkpoint_file cannot be used with --daemon_socket")
+    if args.daemon_socket and args.precompiled:
+        parser.error("--precompiled cannot be used with --daemon_socket")
+    if args.resume and not args.checkpoint_file:
+        parser.error("--resume requires --checkpoint_file")
     if not args.scenario:
         args.scenario = os.path.join(
             os.path.dirname(os.path.abspath(__file__)), "default_scenario.py"
@@ -33,12 +103,93 @@ def parse_args():
     return args
 
 
-if __name__ == "__main__":
+def parse_compile_args(argv):
+    """Parse CLI arguments of compile command."""
+    parser = argparse.ArgumentParser(
+        prog="trextestdirector compile",
+        description="Precompile traffic profiles used in configuration to JSON streams",
+    )
+    parser.add_argument("config", help="path to a yaml config file")
+    parser.add_argument(
+        "output_file", help="path to file where compiled profiles will be saved"
+    )
+    parser.add_argument(
+        "-l", "--log_config", help="path to a yaml file with logging configuration"
+    )
+    return parser.parse_args(argv)
+
+
+def run_in_daemon(args, config):
+    """Submit test to the daemon and return statistics."""
+    # paths are resolved by the daemon, which can be running in other directory
+    for test_config in config.get("tests") or []:
+        for tx_config in test_config.get("transmit", []):
+            if tx_config.get("profile_file"):
+                tx_config["profile_file"] = os.path.abspath(tx_config["profile_file"])
+    scenario = os.path.abspath(args.scenario)
+    statistics = {}
+    for event in submit_job(args.daemon_socket, config, scenario):
+        if event["event"] == "queued":
+            print(f"Test queued at position {event['position']}")
+        elif event["event"] == "iteration":
+            print(f"Test {event['test']}: iteration {event['iteration']} finished")
+        elif event["event"] == "finished":
+            statistics = event["statistics"]
+    return statistics
+
+
+def save_statistics(args, statistics):
+    """Save statistics to the output file if it is defined."""
+    if args.output_file and args.output_format == "columnar":
+        save_columnar(statistics, args.output_file)
+    elif args.output_file:
+        save_results_to_file(statistics, args.output_file)
+
+
+if __name__ == "__main__" and sys.argv[1:2] == ["compile"]:
+    args = parse_compile_args(sys.argv[2:])
+    set_up_logging(args.log_config)
+    compile_profiles(load_config(args.config), args.output_file)
+elif __name__ == "__main__":
     args = parse_args()
     set_up_logging(args.log_config)
-    config = load_config(args.config)
-    TrexTest = TrexStlScenario.load_trex_test_scenario(args.scenario)
-    test = TrexTest(config)
-    test.run()
-    if args.output_file:
-        save_results_to_file(test.statistics, args.output_file)
+    if args.trace_file:
+        tracer.enable()
+    try:
+        config = load_config(args.config)
+        if args.daemon_socket:
+            save_statistics(args, run_in_daemon(args, config))
+        else:
+            TrexTest = TrexStlScenario.load_trex_test_scenario(args.scenario)
+            if args.workers:
+                config["workers"] = assign_workers(config["servers"], args.workers)
+            if config.get("workers"):
+                TrexTest = distributed_scenario(TrexTest)
+            test = TrexTest(config)
+            test.log_config = args.log_config
+            test.force_reset = args.force_reset
+            test.abort_timeout = args.abort_timeout
+            test.cumulative_stats = args.cumulative_stats
+            if args.precompiled:
+                test.precompiled = PrecompiledProfiles(args.precompiled)
+            if args.checkpoint_file:
+                test.checkpoint = Checkpoint(args.checkpoint_file, config)
+                if args.resume:
+                    test.checkpoint.load()
+            try:
+                test.run()
+            finally:
+                # statistics of finished iterations are saved also on abort
+                statistics = {
+                    test_name: {
+                        iteration: stats
+                        for iteration, stats in iterations.items()
+                        if stats
+                    }
+                    for test_name, iterations in test.statistics.items()
+                }
+                save_statistics(args, statistics)
+    finally:
+        if args.trace_file:
+            tracer.save(args.trace_file)
+            tracer.print_summary()
@@ -0,0 +1,137 @@
+"""Closed-loop calibration of TX rate against requested load."""
+
+import logging
+import time
+from collections import OrderedDict, defaultdict
+
+from trextestdirector.utilities import requested_port_rates
+
+logger = logging.getLogger(__name__)
+
+_default_settings = {
+    # duration of a single probe [s]
+    "duration": 2,
+    # allowed relative difference between achieved and requested rate
+    "tolerance": 0.01,
+    "max_iterations": 5,
+}
+
+
+class RateCalibrator:
+    """Finds per port rate multipliers for which achieved TX rate is requested.
+
+    Traffic of all calibrated ports is sent in short probes. Achieved TX rate
+    of each port is computed from differences of its packet and byte counters
+    over the probe and multiplier of ports outside the tolerance is corrected
+    by requested to achieved ratio.
+    """
+
+    def __init__(self, settings=None):
+        settings = settings if isinstance(settings, dict) else {}
+        self.settings = {**_default_settings, **settings}
+
+    @staticmethod
+    def _read_counters(client, port_ids):
+        """Return time of reading and (opackets, obytes) of each port."""
+        stats = client.get_stats(port_ids)
+        read_time = time.monotonic()
+        return read_time, {
+            port_id: (stats[port_id]["opackets"], stats[port_id]["obytes"])
+            for port_id in port_ids
+        }
+
+    def _probe(self, servers, factors):
+        """Send traffic with given multipliers and return achieved TX rates.
+
+        Returns (pps, bps) of each port.
+        """
+        ports_by_server = defaultdict(list)
+        for port in factors:
+            server_name, port_id = port.split(":")
+            ports_by_server[server_name].append(int(port_id))
+        servers = [server for server in servers if server["name"] in ports_by_server]
+        started = defaultdict(list)
+        try:
+            for server in servers:
+                for port_id in ports_by_server[server["name"]]:
+                    factor = factors[f"{server['name']}:{port_id}"]
+                    started[server["name"]].append(port_id)
+                    server["client"].start(
+                        ports=[port_id], mult=f"{factor:f}", force=True
+                    )
+            # counters are read after start, so probe excludes traffic ramp up
+            start_counters = {
+                server["name"]: self._read_counters(
+                    server["client"], ports_by_server[server["name"]]
+                )
+                for server in servers
+            }
+            time.sleep(self.settings["duration"])
+            achieved = {}
+            for server in servers:
+                port_ids = ports_by_server[server["name"]]
+                end_time, end = self._read_counters(server["client"], port_ids)
+                start_time, start = start_counters[server["name"]]
+                elapsed = end_time - start_time
+                for port_id in port_ids:
+                    packets = end[port_id][0] - start[port_id][0]
+                    octets = end[port_id][1] - start[port_id][1]
+                    achieved[f"{server['name']}:{port_id}"] = (
+                        packets / elapsed,
+                        octets * 8 / elapsed,
+                    )
+        finally:
+            # probe traffic is stopped also when probe fails
+            for server in servers:
+                if started[server["name"]]:
+                    server["client"].stop(started[server["name"]])
+        return achieved
+
+    def calibrate(self, servers, transmit_config):
+        """Return calibration result of each "server:port" of transmit config.
+
+        Only ports of given servers are calibrated.
+        """
+        server_names = {server["name"] for server in servers}
+        rates = requested_port_rates(transmit_config)
+        results = OrderedDict(
+            (
+                port,
+                {
+                    "factor": 1.0,
+                    "requested_pps": requested_pps,
+                    "achieved_pps": None,
+                    "achieved_bps": None,
+                    "iterations": 0,
+                    "converged": False,
+                },
+            )
+            for port, requested_pps in rates.items()
+            if requested_pps > 0 and port.split(":")[0] in server_names
+        )
+        for iteration in range(self.settings["max_iterations"]):
+            factors = {
+                port: result["factor"]
+                for port, result in results.items()
+                if not result["converged"]
+            }
+            if not factors:
+                break
+            achieved = self._probe(servers, factors)
+            for port, (achieved_pps, achieved_bps) in achieved.items():
+                result = results[port]
+                result["achieved_pps"] = achieved_pps
+                result["achieved_bps"] = achieved_bps
+                result["iterations"] += 1
+                error = achieved_pps / result["requested_pps"] - 1
+                if abs(error) <= self.settings["tolerance"]:
+                    result["converged"] = True
+                elif achieved_pps > 0:
+                    result["factor"] *= result["requested_pps"] / achieved_pps
+                logger.debug(f"{port}: calibration iteration {iteration + 1}: {result}")
+        for port, result in results.items():
+            if not result["converged"]:
+                logger.warning(
+                    f"{port}: achieved {result['achieved_pps']} pps of requested {result['requested_pps']} pps after calibration"
+                )
+        return results
@@ -0,0 +1,110 @@
+"""Checkpointing of completed test iterations."""
+import hashlib
+import json
+import logging
+import os
+import os.path
+
+from trextestdirector.errors import TrexTestDirectorError
+from trextestdirector.utilities import json_default
+
+logger = logging.getLogger(__name__)
+
+
+def hash_config(config):
+    """Return a hash identifying the configuration of a test campaign."""
+    serialized = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+class Checkpoint:
+    """State file with completed (test, iteration) units and their statistics.
+
+    The file is written in JSON lines: a header with the configuration hash
+    followed by one record per completed iteration, so every iteration
+    appends only its own statistics.
+    """
+
+    def __init__(self, path, config):
+        self.path = path
+        self.config_hash = hash_config(config)
+        self.completed = set()
+        self.statistics = {}
+        self._loaded = False
+
+    def load(self):
+        """Load state saved by a previous, unfinished run."""
+        if not os.path.exists(self.path):
+            logger.warning(f"Checkpoint file {self.path} not found. Starting anew")
+            return
+        valid_size = 0
+        with open(self.path, "rb") as file_handler:
+            header = self._parse(file_handler.readline())
+            if not isinstance(header, dict):
+                # crashed while starting the file, nothing was completed
+                logger.warning(
+                    f"Checkpoint file {self.path} has a broken header. Starting anew"
+                )
+                return
+            if header.get("config_hash") != self.config_hash:
+                raise TrexTestDirectorError(
+                    f"Checkpoint file {self.path} was created for a different configuration"
+                )
+            valid_size = file_handler.tell()
+            for line in file_handler:
+                record = self._parse(line)
+                if record is None:
+                    # record interrupted while being written
+                    logger.warning(
+                        f"Checkpoint file {self.path}: skipping broken record"
+                    )
+                    break
+                self._add(record["test"], record["iteration"], record["statistics"])
+                valid_size = file_handler.tell()
+        # drop broken record, so further records are appended after valid ones
+        os.truncate(self.path, valid_size)
+        self._loaded = True
+        logger.info(
+            f"Checkpoint loaded from {self.path}: {len(self.completed)} completed iterations"
+        )
+
+    @staticmethod
+    def _parse(line):
+        """Return JSON line or None if it was not written completely."""
+        if not line.endswith(b"\n"):
+            return None
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+
+    def _add(self, test_name, iteration, stats):
+        self.completed.add((test_name, iteration))
+        self.statistics.setdefault(test_name, {})[iteration] = stats
+
+    def _append(self, record):
+        """Append a record to the checkpoint file, starting it if not loaded."""
+        mode = "a" if self._loaded else "w"
+        with open(self.path, mode) as file_handler:
+            if not self._loaded:
+                json.dump({"config_hash": self.config_hash}, file_handler)
+                file_handler.write("\n")
+            json.dump(record, file_handler, default=json_default)
+            file_handler.write("\n")
+            file_handler.flush()
+            os.fsync(file_handler.fileno())
+        self._loaded = True
+
+    def is_completed(self, test_name, iteration):
+        return (test_name, iteration) in self.completed
+
+    def mark_completed(self, test_name, iteration, stats):
+        """Record finished iteration and append it to the checkpoint file."""
+        self.completed.add((test_name, iteration))
+        self._append({"test": test_name, "iteration": iteration, "statistics": stats})
+        logger.debug(f"{test_name}: iteration {iteration} saved to checkpoint")
+
+    def restore(self, statistics):
+        """Merge statistics of iterations loaded from file into test statistics."""
+        for test_name, iterations in self.statistics.items():
+            statistics.setdefault(test_name, {}).update(iterations)
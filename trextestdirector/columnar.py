@@ -0,0 +1,256 @@
+"""Columnar binary format of test statistics.
+
+Statistics are flattened to rows of typed numeric columns: test, iteration,
+server, port, pg_id, metric and value. A file starts with a magic string and
+a JSON header describing tables of names and offsets of columns, followed by
+raw column data aligned for memory mapping. Metrics are paths in statistics
+with "{port}" and "{pg_id}" placeholders, e.g. "{port}/opackets",
+"flow_stats/{pg_id}/rx_pkts/{port}" or "latency/{pg_id}/latency/average".
+Non-numeric values are not stored.
+
+This module requires numpy.
+"""
+import argparse
+import json
+import math
+import struct
+
+from trextestdirector.errors import TrexTestDirectorError
+from trextestdirector.tracing import span
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MAGIC = b"TTDCOL1\n"
+ALIGNMENT = 64
+
+_columns = [
+    ("test", "<u4"),
+    ("iteration", "<u4"),
+    ("server", "<u4"),
+    ("port", "<i4"),
+    ("pg_id", "<i4"),
+    ("metric", "<u4"),
+    ("value", "<f8"),
+]
+
+_pg_id_stats = ("flow_stats", "latency")
+
+
+def _require_numpy():
+    if numpy is None:
+        raise TrexTestDirectorError(
+            "Columnar results format requires numpy: pip3 install numpy"
+        )
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _is_id(key):
+    return isinstance(key, int) or (isinstance(key, str) and key.isdigit())
+
+
+def _flatten(tree, path, port, pg_id):
+    """Yield (metric path, port, pg_id, value) for numeric leaves of tree."""
+    if hasattr(tree, "to_dict"):
+        tree = tree.to_dict()
+    for key, value in tree.items():
+        key_path = path + [str(key)]
+        key_port, key_pg_id = port, pg_id
+        if not path and _is_id(key):
+            key_path, key_port = ["{port}"], int(key)
+        elif len(path) == 1 and path[0] in _pg_id_stats and _is_id(key):
+            key_path, key_pg_id = path + ["{pg_id}"], int(key)
+        elif len(path) == 3 and path[0] == "flow_stats" and _is_id(key):
+            # per port flow stats counters, e.g. flow_stats/11/tx_pkts/0
+            key_path, key_port = path + ["{port}"], int(key)
+        if isinstance(value, dict) or hasattr(value, "to_dict"):
+            yield from _flatten(value, key_path, key_port, key_pg_id)
+        elif isinstance(value, (int, float)) or value is None:
+            yield "/".join(key_path), key_port, key_pg_id, value
+
+
+def statistics_to_columns(statistics):
+    """Flatten statistics to a header dict and a dict of numpy arrays."""
+    _require_numpy()
+    tables = {"tests": {}, "servers": {}, "metrics": {}}
+    integer_metrics = {}
+    rows = {name: [] for name, _ in _columns}
+    for test_name, iterations in statistics.items():
+        test_idx = tables["tests"].setdefault(test_name, len(tables["tests"]))
+        for iteration, servers in iterations.items():
+            for server_name, stats in servers.items():
+                server_idx = tables["servers"].setdefault(
+                    server_name, len(tables["servers"])
+                )
+                for metric, port, pg_id, value in _flatten(stats, [], -1, -1):
+                    metric_idx = tables["metrics"].setdefault(
+                        metric, len(tables["metrics"])
+                    )
+                    integer_metrics[metric] = integer_metrics.get(
+                        metric, True
+                    ) and isinstance(value, int)
+                    rows["test"].append(test_idx)
+                    rows["iteration"].append(int(iteration))
+                    rows["server"].append(server_idx)
+                    rows["port"].append(port)
+                    rows["pg_id"].append(pg_id)
+                    rows["metric"].append(metric_idx)
+                    rows["value"].append(math.nan if value is None else value)
+    header = {name: list(table) for name, table in tables.items()}
+    header["integer_metrics"] = [
+        metric for metric in header["metrics"] if integer_metrics[metric]
+    ]
+    columns = {
+        name: numpy.asarray(rows[name], dtype=dtype) for name, dtype in _columns
+    }
+    return header, columns
+
+
+def save_columnar(statistics, file_name):
+    """Save statistics in columnar binary format."""
+    with span("write_results", file=file_name, format="columnar"):
+        header, columns = statistics_to_columns(statistics)
+        # column offsets depend on header size, so reserve space for them
+        header["columns"] = {
+            name: {"dtype": dtype, "offset": 0, "count": len(columns[name])}
+            for name, dtype in _columns
+        }
+        header_size = len(json.dumps(header)) + 32 * len(_columns)
+        offset = _align(len(MAGIC) + 8 + header_size)
+        for name, _ in _columns:
+            header["columns"][name]["offset"] = offset
+            offset = _align(offset + columns[name].nbytes)
+        header_data = json.dumps(header).encode().ljust(header_size)
+        with open(file_name, "wb") as file_handler:
+            file_handler.write(MAGIC)
+            file_handler.write(struct.pack("<Q", len(header_data)))
+            file_handler.write(header_data)
+            for name, _ in _columns:
+                file_handler.seek(header["columns"][name]["offset"])
+                file_handler.write(columns[name].tobytes())
+
+
+class ColumnarResults:
+    """Reader of columnar statistics file memory-mapping its columns."""
+
+    def __init__(self, file_name):
+        _require_numpy()
+        with open(file_name, "rb") as file_handler:
+            if file_handler.read(len(MAGIC)) != MAGIC:
+                raise TrexTestDirectorError(
+                    f"{file_name} is not a columnar results file"
+                )
+            (header_size,) = struct.unpack("<Q", file_handler.read(8))
+            self.header = json.loads(file_handler.read(header_size))
+        self.tests = self.header["tests"]
+        self.servers = self.header["servers"]
+        self.metrics = self.header["metrics"]
+        self.columns = {}
+        for name, column in self.header["columns"].items():
+            if not column["count"]:
+                self.columns[name] = numpy.empty(0, dtype=column["dtype"])
+                continue
+            self.columns[name] = numpy.memmap(
+                file_name,
+                dtype=column["dtype"],
+                mode="r",
+                offset=column["offset"],
+                shape=(column["count"],),
+            )
+
+    def __len__(self):
+        return len(self.columns["value"])
+
+    def _mask(self, column, values, table=None):
+        values = values if isinstance(values, (list, tuple, set)) else [values]
+        if table is not None:
+            values = [table.index(value) for value in values if value in table]
+        return numpy.isin(self.columns[column], list(values))
+
+    def select(
+        self, test=None, iteration=None, server=None, port=None, pg_id=None, metric=None
+    ):
+        """Return dict of columns of rows matching all provided filters.
+
+        Each filter can be a single value or a list of values. Tests, servers
+        and metrics are filtered by names.
+        """
+        filters = [
+            ("test", test, self.tests),
+            ("iteration", iteration, None),
+            ("server", server, self.servers),
+            ("port", port, None),
+            ("pg_id", pg_id, None),
+            ("metric", metric, self.metrics),
+        ]
+        mask = numpy.ones(len(self), dtype=bool)
+        for column, values, table in filters:
+            if values is not None:
+                mask &= self._mask(column, values, table)
+        (indexes,) = numpy.nonzero(mask)
+        return {name: column[indexes] for name, column in self.columns.items()}
+
+    def to_statistics(self):
+        """Return statistics in the same shape as saved in JSON file."""
+        statistics = {}
+        integer_metrics = set(self.header["integer_metrics"])
+        rows = zip(*(self.columns[name] for name, _ in _columns))
+        for test, iteration, server, port, pg_id, metric, value in rows:
+            metric_name = self.metrics[metric]
+            if math.isnan(value):
+                value = None
+            elif metric_name in integer_metrics:
+                value = int(value)
+            else:
+                value = float(value)
+            tree = statistics.setdefault(self.tests[test], {})
+            tree = tree.setdefault(str(iteration), {})
+            tree = tree.setdefault(self.servers[server], {})
+            path = (
+                metric_name.replace("{port}", str(port))
+                .replace("{pg_id}", str(pg_id))
+                .split("/")
+            )
+            for key in path[:-1]:
+                tree = tree.setdefault(key, {})
+            tree[path[-1]] = value
+        return statistics
+
+
+def json_to_columnar(json_file_name, file_name):
+    """Convert statistics saved in JSON file to columnar format."""
+    with open(json_file_name, "rt") as file_handler:
+        statistics = json.load(file_handler)
+    save_columnar(statistics, file_name)
+
+
+def columnar_to_json(file_name, json_file_name):
+    """Convert statistics saved in columnar format to JSON file."""
+    statistics = ColumnarResults(file_name).to_statistics()
+    with open(json_file_name, "w+") as file_handler:
+        json.dump(statistics, file_handler, indent=2)
+
+
+def parse_args():
+    """Parse CLI arguments."""
+    parser = argparse.ArgumentParser(
+        prog="trextestdirector.columnar",
+        description="Convert statistics between JSON and columnar formats",
+    )
+    parser.add_argument("direction", choices=["to-json", "from-json"])
+    parser.add_argument("input_file", help="path to file with statistics")
+    parser.add_argument("output_file", help="path to file with converted statistics")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.direction == "to-json":
+        columnar_to_json(args.input_file, args.output_file)
+    else:
+        json_to_columnar(args.input_file, args.output_file)
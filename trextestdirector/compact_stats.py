@@ -0,0 +1,133 @@
+"""Field projection and compact storage of TRex statistics.
+
+Projection is a list of paths of stats to keep, with levels separated by "/"
+and "*" matching any key, e.g. "global/cpu_util", "*/opackets" or
+"latency/*/latency/average". A path pointing to a dict keeps all values
+below it. Kept values are stored in typed arrays and paths are shared between
+snapshots with the same layout. Booleans and integers out of the 64-bit range
+are kept as objects, so they come back unchanged.
+"""
+import math
+import weakref
+from array import array
+
+
+def parse_projection(projection):
+    """Return projection paths split into tuples of levels."""
+    return [tuple(str(path).split("/")) for path in projection]
+
+
+def _collect(tree, path, leaves):
+    for key, value in tree.items():
+        if isinstance(value, dict):
+            _collect(value, path + (key,), leaves)
+        elif isinstance(value, (int, float)) or value is None:
+            leaves.append((path + (key,), value))
+
+
+def _project(tree, patterns, path, leaves):
+    for key, value in tree.items():
+        rest = [
+            pattern[1:] for pattern in patterns if pattern[0] in ("*", str(key))
+        ]
+        if not rest:
+            continue
+        key_path = path + (key,)
+        if any(not pattern for pattern in rest):
+            if isinstance(value, dict):
+                _collect(value, key_path, leaves)
+            elif isinstance(value, (int, float)) or value is None:
+                leaves.append((key_path, value))
+        elif isinstance(value, dict):
+            patterns_rest = [pattern for pattern in rest if pattern]
+            _project(value, patterns_rest, key_path, leaves)
+
+
+_INT64_MIN = -(2**63)
+_INT64_MAX = 2**63 - 1
+
+
+def _kind(value):
+    """Return typecode of array storing the value or "o" for objects."""
+    if isinstance(value, bool):
+        return "o"
+    if isinstance(value, int):
+        return "q" if _INT64_MIN <= value <= _INT64_MAX else "o"
+    return "d"
+
+
+class _Schema:
+    """Paths and types of values of compact stats."""
+
+    __slots__ = ("paths", "kinds", "__weakref__")
+
+    def __init__(self, paths, kinds):
+        self.paths = paths
+        self.kinds = kinds
+
+
+# schemas are interned, so snapshots with the same layout share them; a schema
+# is dropped with the last snapshot using it, e.g. in a long-running daemon
+_schemas = weakref.WeakValueDictionary()
+
+
+class CompactStats:
+    """Projected stats with integers and floats kept in typed arrays."""
+
+    __slots__ = ("schema", "integers", "floats", "objects")
+
+    def __init__(self, stats, projection):
+        leaves = []
+        _project(stats, projection, (), leaves)
+        paths = tuple(path for path, _ in leaves)
+        kinds = tuple(_kind(value) for _, value in leaves)
+        schema_key = (paths, kinds)
+        schema = _schemas.get(schema_key)
+        if schema is None:
+            schema = _schemas[schema_key] = _Schema(paths, kinds)
+        self.schema = schema
+        self.integers = array(
+            "q", (value for (_, value), kind in zip(leaves, kinds) if kind == "q")
+        )
+        self.floats = array(
+            "d",
+            (
+                math.nan if value is None else value
+                for (_, value), kind in zip(leaves, kinds)
+                if kind == "d"
+            ),
+        )
+        self.objects = tuple(
+            value for (_, value), kind in zip(leaves, kinds) if kind == "o"
+        )
+
+    def items(self):
+        """Yield (path, value) pairs of kept stats."""
+        integers = iter(self.integers)
+        floats = iter(self.floats)
+        objects = iter(self.objects)
+        for path, kind in zip(self.schema.paths, self.schema.kinds):
+            if kind == "q":
+                yield path, next(integers)
+            elif kind == "o":
+                yield path, next(objects)
+            else:
+                value = next(floats)
+                yield path, None if math.isnan(value) else value
+
+    def to_dict(self):
+        """Return kept stats as nested dicts."""
+        stats = {}
+        for path, value in self.items():
+            tree = stats
+            for key in path[:-1]:
+                tree = tree.setdefault(key, {})
+            tree[path[-1]] = value
+        return stats
+
+
+def project_stats(stats, projection):
+    """Return compact stats or stats unchanged if there is no projection."""
+    if not projection:
+        return stats
+    return CompactStats(stats, projection)
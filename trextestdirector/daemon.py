@@ -0,0 +1,221 @@
+"""Long-lived TRex Test Director daemon.
+
+The daemon keeps clients connected to TRex servers and ports acquired between
+jobs. Jobs (a configuration and an optional test scenario) are submitted over
+a local Unix socket, run one after another and results are streamed back to
+the submitter as JSON lines.
+"""
+import argparse
+import json
+import logging
+import os
+import os.path
+import queue
+import socket
+import socketserver
+import threading
+
+from trex.common.trex_exceptions import TRexError
+from trextestdirector.errors import (
+    TrexTestDirectorError,
+    TrexTestDirectorInterruptError,
+)
+from trextestdirector.trex_stl_scenario import TrexStlScenario
+from trextestdirector.utilities import call_parallel, json_default, set_up_logging
+
+logger = logging.getLogger(__name__)
+
+_default_scenario = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "default_scenario.py"
+)
+
+
+class _Job:
+    """Submitted job with a queue of events to send back to the submitter."""
+
+    def __init__(self, request):
+        self.config = request["config"]
+        self.scenario = request.get("scenario") or _default_scenario
+        self.events = queue.Queue()
+
+    def send(self, event, **kwargs):
+        self.events.put({"event": event, **kwargs})
+
+
+class _JobRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            job = _Job(json.loads(self.rfile.readline()))
+        except (ValueError, KeyError) as e:
+            self._write({"event": "error", "message": f"Invalid job request: {e}"})
+            return
+        self.server.director.submit(job)
+        while True:
+            event = job.events.get()
+            self._write(event)
+            if event["event"] in ("finished", "error"):
+                break
+
+    def _write(self, event):
+        self.wfile.write(json.dumps(event, default=json_default).encode() + b"\n")
+        self.wfile.flush()
+
+
+class _JobServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class Director:
+    """Runs submitted jobs on clients kept connected between jobs."""
+
+    def __init__(self, socket_path, force_reset=False, shutdown_timeout=10.0):
+        self.socket_path = socket_path
+        self.force_reset = force_reset
+        # deadline of closing all sessions on shut down [s]
+        self.shutdown_timeout = shutdown_timeout
+        self.jobs = queue.Queue()
+        # connected clients by (management_ip, sync_port)
+        self.sessions = {}
+
+    def submit(self, job):
+        self.jobs.put(job)
+        job.send("queued", position=self.jobs.qsize())
+
+    def _attach_sessions(self, scenario):
+        """Replace scenario's clients with clients kept by the daemon."""
+        for server in scenario.servers:
+            client = server["client"]
+            address = (client.ctx.server, client.ctx.sync_port)
+            if address in self.sessions:
+                server["client"] = self.sessions[address]
+            else:
+                self.sessions[address] = client
+        scenario.clients = [server["client"] for server in scenario.servers]
+
+    def _run_job(self, job):
+        job.send("started")
+        TrexTest = TrexStlScenario.load_trex_test_scenario(job.scenario)
+        scenario = TrexTest(job.config)
+        scenario.force_reset = self.force_reset
+        self._attach_sessions(scenario)
+        scenario.iteration_callbacks.append(
+            lambda test_name, iteration, stats: job.send(
+                "iteration", test=test_name, iteration=iteration, statistics=stats
+            )
+        )
+        try:
+            scenario._set_up()
+            scenario.run_tests()
+        finally:
+            # keep ports acquired and set up for the next job
+            hung = scenario._stop_traffic(scenario.stop_timeout)
+            self._abandon_sessions(scenario, hung)
+        job.send("finished", statistics=scenario.statistics)
+
+    def _abandon_sessions(self, scenario, server_names):
+        """Forget sessions of servers, which client is stuck in a call."""
+        for server in scenario.servers:
+            if server["name"] in server_names:
+                client = server["client"]
+                address = (client.ctx.server, client.ctx.sync_port)
+                logger.error("{}:{}: abandoning session".format(*address))
+                self.sessions.pop(address, None)
+
+    def _shut_down_session(self, address, client):
+        logger.debug("disconnecting from {}:{}".format(*address))
+        for method in (client.reset, client.release):
+            try:
+                method()
+            except TRexError as e:
+                logger.error(e)
+        if client.is_connected():
+            client.disconnect()
+
+    def _shut_down(self):
+        calls = [
+            lambda address=address, client=client: self._shut_down_session(
+                address, client
+            )
+            for address, client in self.sessions.items()
+        ]
+        results = call_parallel(calls, self.shutdown_timeout)
+        for address, (_, error) in zip(self.sessions, results):
+            if error:
+                logger.error("{}:{}: disconnect failed: {!r}".format(*address, error))
+
+    def serve(self):
+        """Accept jobs on the socket and run them until interrupted."""
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        server = _JobServer(self.socket_path, _JobRequestHandler)
+        server.director = self
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        logger.info(f"Waiting for jobs on {self.socket_path}")
+        try:
+            while True:
+                try:
+                    job = self.jobs.get(timeout=1)
+                except queue.Empty:
+                    continue
+                try:
+                    self._run_job(job)
+                except (TrexTestDirectorInterruptError, KeyboardInterrupt):
+                    job.send("error", message="Daemon interrupted")
+                    raise
+                except Exception as e:
+                    logger.error("Job failed", exc_info=e)
+                    job.send("error", message=str(e))
+        except (TrexTestDirectorInterruptError, KeyboardInterrupt):
+            logger.info("Shutting down")
+        finally:
+            server.shutdown()
+            server.server_close()
+            os.remove(self.socket_path)
+            self._shut_down()
+
+
+def submit_job(socket_path, config, scenario=None):
+    """Submit a job to the daemon and yield events sent back by the daemon."""
+    request = {"config": config, "scenario": scenario}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        with sock.makefile("rb") as events:
+            for line in events:
+                event = json.loads(line)
+                yield event
+                if event["event"] == "error":
+                    raise TrexTestDirectorError(event["message"])
+                if event["event"] == "finished":
+                    return
+
+
+def parse_args():
+    """Parse CLI arguments."""
+    parser = argparse.ArgumentParser(
+        prog="trextestdirector.daemon",
+        description="TRex Test Director daemon keeping TRex sessions between jobs",
+    )
+    parser.add_argument("socket", help="path to a Unix socket accepting jobs")
+    parser.add_argument(
+        "-l", "--log_config", help="path to a yaml file with logging configuration"
+    )
+    parser.add_argument(
+        "-f",
+        "--force_reset",
+        action="store_true",
+        help="reset and set up ports from scratch for every job",
+    )
+    parser.add_argument(
+        "--shutdown_timeout",
+        type=float,
+        default=10.0,
+        help="deadline [s] of releasing ports and disconnecting on shut down",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    set_up_logging(args.log_config)
+    Director(args.socket, args.force_reset, args.shutdown_timeout).serve()
@@ -0,0 +1,722 @@
+"""Distributed TRex Test Director with a coordinator and worker processes.
+
+Each worker process owns a subset of servers: it connects to them, sets up
+their ports, loads streams, starts traffic and fetches stats. The coordinator
+runs the test scenario - it sequences tests, resolves transmit configuration,
+starts traffic on all workers at the same moment and merges statistics.
+Coordinator and workers exchange JSON lines over TCP, one response for each
+request.
+
+Workers are spawned locally by the coordinator or started on other hosts with:
+
+    TREXTESTDIRECTOR_WORKER_TOKEN=secret \
+        python -m trextestdirector.distributed --bind 0.0.0.0:5600
+
+Every connection starts with the token shared by the coordinator and the
+worker, so only coordinators knowing it can control worker's TRex servers.
+"""
+import argparse
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import queue
+import secrets
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+
+from trextestdirector.errors import (
+    TrexTestDirectorError,
+    TrexTestDirectorInterruptError,
+)
+from trextestdirector.generator_stats import GeneratorMonitor
+from trextestdirector.precompile import PrecompiledProfiles
+from trextestdirector.tracing import span, tagged, tracer
+from trextestdirector.trex_stl_scenario import TrexStlScenario
+from trextestdirector.utilities import call_parallel, json_default, set_up_logging
+
+logger = logging.getLogger(__name__)
+
+# time between sending start command to workers and starting traffic [s]
+_default_start_delay = 0.5
+# time to wait for a worker to start listening or to exit [s]
+_worker_timeout = 30
+# environment variable with token authenticating coordinators to workers
+TOKEN_VARIABLE = "TREXTESTDIRECTOR_WORKER_TOKEN"
+
+
+def _encode(message):
+    return json.dumps(message, default=json_default).encode() + b"\n"
+
+
+def _decode(line):
+    return json.loads(line)
+
+
+def _int_keys(tree):
+    if not isinstance(tree, dict):
+        return tree
+    return {int(key) if key.isdigit() else key: value for key, value in tree.items()}
+
+
+def _restore_stats_keys(stats):
+    """Return TRex stats of a server with int port ids and pg_ids.
+
+    JSON turns integer keys into strings. Only keys of port and pg_id levels
+    (and latency histogram buckets) are converted back, other keys are left
+    as they are.
+    """
+    stats = _int_keys(stats)
+    if isinstance(stats.get("flow_stats"), dict):
+        stats["flow_stats"] = {
+            pg_id: (
+                {counter: _int_keys(ports) for counter, ports in pg_stats.items()}
+                if isinstance(pg_stats, dict)
+                else pg_stats
+            )
+            for pg_id, pg_stats in _int_keys(stats["flow_stats"]).items()
+        }
+    if isinstance(stats.get("latency"), dict):
+        stats["latency"] = _int_keys(stats["latency"])
+        for pg_stats in stats["latency"].values():
+            latency = pg_stats.get("latency") if isinstance(pg_stats, dict) else None
+            if isinstance(latency, dict) and "histogram" in latency:
+                latency["histogram"] = _int_keys(latency["histogram"])
+    return stats
+
+
+def _is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _parallel(function, items):
+    """Call function for each item in parallel and return results in order."""
+    results = call_parallel([lambda item=item: function(item) for item in items])
+    for _, error in results:
+        if error:
+            raise error
+    return [result for result, _ in results]
+
+
+def assign_workers(servers_config, count):
+    """Return workers configuration splitting servers among `count` workers."""
+    server_names = [server_config["name"] for server_config in servers_config]
+    count = max(1, min(count, len(server_names)))
+    return [{"servers": server_names[idx::count]} for idx in range(count)]
+
+
+#
+#   Worker
+#
+
+
+class _WorkerScenario(TrexStlScenario):
+    """Scenario performing setup, traffic and stats steps on owned servers."""
+
+    def __init__(self, config, server_names, aborted):
+        super().__init__(config)
+        self.servers = [
+            server for server in self.servers if server["name"] in server_names
+        ]
+        self.clients = [server["client"] for server in self.servers]
+        self.resolved_transmit = None
+        self.aborted = aborted
+
+    def _resolve_transmit(self, test_config):
+        # transmit is resolved by the coordinator, which knows speeds of all ports
+        if self.resolved_transmit is not None:
+            return self.resolved_transmit
+        return super()._resolve_transmit(test_config)
+
+    def wait_on_traffic(self):
+        """Wait until traffic stops or abort is requested."""
+        while any(server["client"].is_traffic_active() for server in self.servers):
+            if self.aborted.is_set():
+                raise TrexTestDirectorInterruptError
+            with span("stats_sampling"):
+                self.generator_monitor.sample(self.servers)
+            self.aborted.wait(self.stats_sampling_interval)
+        for server in self.servers:
+            server["client"].wait_on_traffic()
+
+    def test(self):
+        pass
+
+
+class Worker:
+    """Executes coordinator commands on owned servers.
+
+    Commands use TRex clients, which are not thread-safe, so all of them,
+    including abort, run in one thread. `request_abort` may be called from
+    another thread; it only interrupts waiting of the running command.
+    """
+
+    commands = (
+        "init",
+        "connect",
+        "set_up_servers",
+        "port_speed",
+        "set_up_test",
+        "start",
+        "wait",
+        "monitor_start",
+        "monitor_samples",
+        "capture_start",
+        "capture_finish",
+        "get_stats",
+        "tear_down",
+        "trace_spans",
+    )
+
+    def __init__(self):
+        self.scenario = None
+        self.set_up = False
+        self.aborted = threading.Event()
+        self.abort_args = {}
+
+    def init(
+        self,
+        config,
+        servers,
+        force_reset=False,
+        precompiled=None,
+        stats_sampling_interval=1.0,
+        trace=False,
+    ):
+        tracer.enable(trace)
+        self.scenario = _WorkerScenario(config, servers, self.aborted)
+        self.scenario.force_reset = force_reset
+        self.scenario.stats_sampling_interval = stats_sampling_interval
+        if precompiled:
+            self.scenario.precompiled = PrecompiledProfiles(precompiled)
+        logger.info(f"Worker owns servers {servers}")
+
+    def connect(self):
+        self.set_up = True
+        self.scenario._connect_clients()
+
+    def set_up_servers(self):
+        self.scenario._set_up_servers()
+
+    def port_speed(self, server_name, port_id):
+        return self.scenario._get_port_speed(server_name, port_id)
+
+    def set_up_test(self, test_config, transmit):
+        self.scenario.resolved_transmit = transmit
+        self.scenario._set_up_test(test_config)
+        return self.scenario.calibration
+
+    def start(self, servers, start_at):
+        servers = [
+            server for server in self.scenario.servers if server["name"] in servers
+        ]
+        if not servers:
+            return
+        if self.aborted.wait(max(0, start_at - time.time())):
+            return
+        self.scenario.start_traffic(servers, wait_for_traffic=False)
+
+    def wait(self):
+        self.scenario.wait_on_traffic()
+
+    def monitor_start(self):
+        self.scenario.generator_monitor.start()
+
+    def monitor_samples(self):
+        return self.scenario.generator_monitor.get_samples()
+
+    def capture_start(self):
+        if self.scenario.rx_capture:
+            self.scenario.rx_capture.start(self.scenario.servers)
+
+    def capture_finish(self):
+        if not self.scenario.rx_capture:
+            return {}
+        return self.scenario.rx_capture.finish()
+
+    def get_stats(self):
+        return self.scenario._get_stats()
+
+    def tear_down(self):
+        self.set_up = False
+        self.scenario._tear_down()
+
+    def trace_spans(self):
+        return tracer.export_spans()
+
+    def request_abort(self, stop_timeout, abort_timeout):
+        """Interrupt waiting of the running command and schedule abort."""
+        self.abort_args = {"stop_timeout": stop_timeout, "abort_timeout": abort_timeout}
+        self.aborted.set()
+
+    def abort(self):
+        """Stop traffic and tear down owned servers within `abort_timeout`."""
+        self.set_up = False
+        if not self.scenario:
+            return
+        self.scenario.stop_timeout = self.abort_args["stop_timeout"]
+        self.scenario.abort_timeout = self.abort_args["abort_timeout"]
+        self.scenario._abort()
+
+    def close(self):
+        """Tear down servers left set up by a disconnected coordinator."""
+        if self.set_up:
+            logger.warning("Coordinator disconnected. Tearing down")
+            try:
+                self.tear_down()
+            except Exception as e:
+                logger.error("Tear down failed", exc_info=e)
+
+
+class _CommandHandler(socketserver.StreamRequestHandler):
+    """Executes commands one after another in a separate thread.
+
+    "abort" interrupts the running command as soon as it is received. The
+    executor thread skips queued commands and aborts, so TRex clients are
+    never used by two threads at once.
+    """
+
+    def handle(self):
+        if not self._authenticate():
+            return
+        worker = Worker()
+        requests = queue.Queue()
+        executor = threading.Thread(
+            target=self._execute, args=(worker, requests), daemon=True
+        )
+        executor.start()
+        try:
+            for line in self.rfile:
+                request = _decode(line)
+                if request.get("command") == "abort":
+                    logger.warning("Abort requested by coordinator")
+                    worker.request_abort(**request.get("args", {}))
+                    break
+                requests.put(request)
+        finally:
+            requests.put(None)
+            if worker.aborted.is_set():
+                executor.join(worker.abort_args["abort_timeout"] + _worker_timeout)
+                if executor.is_alive():
+                    logger.error("Abort did not finish, a command is still running")
+            elif worker.set_up:
+                # coordinator disconnected, let the running command finish
+                executor.join()
+                worker.close()
+
+    def _authenticate(self):
+        """Check token sent by the coordinator in the first line."""
+        line = self.rfile.readline()
+        try:
+            token = _decode(line).get("token") or ""
+        except ValueError:
+            token = ""
+        expected = self.server.token or ""
+        if not hmac.compare_digest(token.encode(), expected.encode()):
+            logger.error(f"{self.client_address[0]}: authentication failed")
+            self.wfile.write(_encode({"error": "authentication failed"}))
+            return False
+        self.wfile.write(_encode({"result": None}))
+        return True
+
+    def _execute(self, worker, requests):
+        try:
+            self._execute_commands(worker, requests)
+        finally:
+            if worker.aborted.is_set():
+                try:
+                    worker.abort()
+                except Exception as e:
+                    logger.error("Abort failed", exc_info=e)
+
+    def _execute_commands(self, worker, requests):
+        for request in iter(requests.get, None):
+            if worker.aborted.is_set():
+                return
+            command = request.get("command")
+            try:
+                if command not in Worker.commands:
+                    raise TrexTestDirectorError(f"Unknown command {command}")
+                # spans are tagged like the coordinator's span of the call
+                with tagged(**request.get("tags", {})):
+                    result = getattr(worker, command)(**request.get("args", {}))
+                response = {"result": result}
+            except TrexTestDirectorInterruptError:
+                return
+            except Exception as e:
+                logger.error(f"Command {command} failed", exc_info=e)
+                response = {"error": f"{type(e).__name__}: {e}"}
+            try:
+                self.wfile.write(_encode(response))
+                self.wfile.flush()
+            except OSError:
+                # coordinator is gone
+                return
+
+
+class _WorkerServer(socketserver.TCPServer):
+    allow_reuse_address = True
+    token = None
+
+
+def serve(bind, once=False, log_config=None, token=None):
+    """Execute commands of coordinators connecting to `bind` address.
+
+    Coordinators have to send `token` first. Worker listening on an address
+    other than loopback requires a token.
+    """
+    host, port = bind.rsplit(":", 1)
+    if not token and not _is_loopback(host):
+        raise TrexTestDirectorError(
+            f"Worker listening on {host} requires a token in {TOKEN_VARIABLE}"
+        )
+    with _WorkerServer((host, int(port)), _CommandHandler) as server:
+        server.token = token
+        address = "{}:{}".format(*server.server_address[:2])
+        # coordinator spawning the worker reads the address from stdout
+        print(f"listening on {address}", flush=True)
+        sys.stdout = sys.stderr
+        set_up_logging(log_config)
+        if once:
+            server.handle_request()
+        else:
+            server.serve_forever()
+
+
+#
+#   Coordinator
+#
+
+
+class WorkerConnection:
+    """Connection to a worker owning `servers`."""
+
+    def __init__(self, address, servers, process=None, token=None):
+        self.address = address
+        self.servers = servers
+        self.process = process
+        self.token = token
+        self._socket = None
+        self._reader = None
+
+    @classmethod
+    def spawn(cls, servers, log_config=None):
+        """Start a local worker process serving a single coordinator.
+
+        Waits at most `_worker_timeout` for the worker to start listening.
+        """
+        # a random token protects the worker from other local users
+        token = secrets.token_hex(16)
+        command = [
+            sys.executable,
+            "-m",
+            "trextestdirector.distributed",
+            "--bind",
+            "127.0.0.1:0",
+            "--once",
+        ]
+        if log_config:
+            command += ["--log_config", log_config]
+        # worker is in its own session, so Ctrl-C is handled by the coordinator
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            start_new_session=True,
+            text=True,
+            env={**os.environ, TOKEN_VARIABLE: token},
+        )
+        address = []
+
+        def read_address():
+            for line in process.stdout:
+                if line.startswith("listening on "):
+                    address.append(line.split()[-1])
+                    return
+
+        reader = threading.Thread(target=read_address, daemon=True)
+        reader.start()
+        reader.join(_worker_timeout)
+        if not address:
+            # worker died or hangs before listening
+            process.kill()
+            process.wait()
+            reader.join()
+            process.stdout.close()
+            raise TrexTestDirectorError(
+                f"Failed to start worker for {servers} (exit code {process.returncode})"
+            )
+        process.stdout.close()
+        return cls(address[0], servers, process, token)
+
+    def connect(self):
+        host, port = self.address.rsplit(":", 1)
+        self._socket = socket.create_connection((host, int(port)), _worker_timeout)
+        self._reader = self._socket.makefile("rb")
+        self._socket.sendall(_encode({"token": self.token}))
+        line = self._reader.readline()
+        self._socket.settimeout(None)
+        if not line or "error" in _decode(line):
+            raise TrexTestDirectorError(f"{self.address}: worker rejected the token")
+
+    def call(self, command, **args):
+        """Execute command on the worker and return its result."""
+        request = {"command": command, "args": args}
+        if tracer.enabled:
+            request["tags"] = tracer.context_tags()
+        with span("worker_call", command=command, worker=self.address):
+            self._socket.sendall(_encode(request))
+            line = self._reader.readline()
+        if not line:
+            raise TrexTestDirectorError(f"{self.address}: worker disconnected")
+        response = _decode(line)
+        if "error" in response:
+            raise TrexTestDirectorError(f"{self.address}: {response['error']}")
+        return response["result"]
+
+    def abort(self, stop_timeout, abort_timeout):
+        """Request abort without waiting for the command in progress."""
+        request = {
+            "command": "abort",
+            "args": {"stop_timeout": stop_timeout, "abort_timeout": abort_timeout},
+        }
+        try:
+            self._socket.sendall(_encode(request))
+            self._socket.shutdown(socket.SHUT_WR)
+        except OSError as e:
+            logger.error(f"{self.address}: cannot send abort: {e}")
+
+    def close(self, timeout=_worker_timeout):
+        """Close connection and wait at most `timeout` for spawned worker exit."""
+        if self._socket:
+            try:
+                # worker tears down when the coordinator disconnects
+                self._socket.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+        if self.process:
+            try:
+                self.process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                logger.warning(f"{self.address}: worker did not exit. Killing")
+                self.process.kill()
+        if self._socket:
+            try:
+                # wake up threads still waiting for responses
+                self._socket.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+            self._reader.close()
+            self._socket.close()
+            self._socket = None
+
+
+class _RemoteGeneratorMonitor(GeneratorMonitor):
+    """Generator monitor merging samples taken by workers."""
+
+    def __init__(self, coordinator, thresholds=None):
+        super().__init__(thresholds)
+        self.coordinator = coordinator
+
+    def start(self):
+        super().start()
+        self.coordinator._call_workers("monitor_start")
+
+    def sample(self, servers):
+        # workers sample their servers while waiting on traffic
+        pass
+
+    def finish(self, stats, transmit_config):
+        for samples in self.coordinator._call_workers("monitor_samples"):
+            self.add_samples(samples)
+        return super().finish(stats, transmit_config)
+
+
+class _RemoteRxCapture:
+    """RX capture merging analysis of ports captured by workers."""
+
+    def __init__(self, coordinator):
+        self.coordinator = coordinator
+
+    def start(self, servers):
+        self.coordinator._call_workers("capture_start")
+
+    def finish(self):
+        results = {}
+        for worker_results in self.coordinator._call_workers("capture_finish"):
+            results.update(worker_results)
+        return results
+
+
+class CoordinatorMixin:
+    """Runs scenario steps on worker processes instead of TRex clients.
+
+    Workers are defined in 'workers' part of the configuration. Workers
+    without an address are spawned locally. Test scenarios should drive
+    traffic only with `start_traffic` and `wait_on_traffic`, because clients
+    of the coordinator are never connected.
+    """
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.config = config
+        self.start_delay = _default_start_delay
+        self.log_config = None
+        self.workers = []
+        self._worker_by_server = {}
+
+    def _call_workers(self, command, workers=None, **args):
+        """Execute command on workers in parallel and return their results."""
+        workers = self.workers if workers is None else workers
+        return _parallel(lambda worker: worker.call(command, **args), workers)
+
+    def _start_worker(self, worker_config):
+        if worker_config.get("address"):
+            worker = WorkerConnection(
+                worker_config["address"],
+                worker_config["servers"],
+                token=worker_config.get("token", os.environ.get(TOKEN_VARIABLE)),
+            )
+        else:
+            worker = WorkerConnection.spawn(worker_config["servers"], self.log_config)
+        worker.connect()
+        worker.call(
+            "init",
+            config=self.config,
+            servers=worker.servers,
+            force_reset=self.force_reset,
+            precompiled=self.precompiled.file_name if self.precompiled else None,
+            stats_sampling_interval=self.stats_sampling_interval,
+            trace=tracer.enabled,
+        )
+        logger.debug(f"{worker.address}: worker owns servers {worker.servers}")
+        return worker
+
+    def _connect_clients(self):
+        with span("workers_start"):
+            self.workers = _parallel(self._start_worker, self.config["workers"])
+        for worker in self.workers:
+            for server_name in worker.servers:
+                self._worker_by_server[server_name] = worker
+        self._call_workers("connect")
+
+    def _disconnect_clients(self, timeout=None):
+        timeout = _worker_timeout if timeout is None else timeout
+        call_parallel(
+            [lambda worker=worker: worker.close(timeout) for worker in self.workers]
+        )
+        self.workers = []
+
+    def _set_up_servers(self):
+        self._loaded_profiles = {}
+        self._call_workers("set_up_servers")
+
+    def _get_port_speed(self, server_name, port_id):
+        worker = self._worker_by_server[server_name]
+        return worker.call("port_speed", server_name=server_name, port_id=port_id)
+
+    def _set_up_test(self, test):
+        test["iteration"] = 0
+        self.test_config = test
+        self.transmit = self._resolve_transmit(test)
+        self.generator_monitor = _RemoteGeneratorMonitor(
+            self, test.get("generator_thresholds")
+        )
+        self.rx_capture = _RemoteRxCapture(self) if test.get("rx_capture") else None
+        self.calibration = {}
+        results = self._call_workers(
+            "set_up_test", test_config=test, transmit=self.transmit
+        )
+        for calibration in results:
+            self.calibration.update(calibration)
+
+    def start_traffic(self, servers=None, wait_for_traffic=True):
+        servers = servers if servers else self.servers
+        server_names = sorted(server["name"] for server in servers)
+        workers = [
+            worker for worker in self.workers if set(worker.servers) & set(server_names)
+        ]
+        start_at = time.time() + self.start_delay
+        self._call_workers("start", workers, servers=server_names, start_at=start_at)
+        if wait_for_traffic:
+            self.wait_on_traffic()
+
+    def wait_on_traffic(self):
+        self._call_workers("wait")
+
+    def _get_stats(self):
+        stats = {}
+        for worker_stats in self._call_workers("get_stats"):
+            stats.update(worker_stats)
+        return {
+            server["name"]: _restore_stats_keys(stats[server["name"]])
+            for server in self.servers
+        }
+
+    def _tear_down(self):
+        try:
+            self._call_workers("tear_down")
+            if tracer.enabled:
+                for spans in self._call_workers("trace_spans"):
+                    tracer.add_spans(spans)
+        finally:
+            self._disconnect_clients()
+
+    def _abort(self):
+        deadline = time.monotonic() + self.abort_timeout
+        logger.warning("Aborting test. Stopping traffic on all workers")
+        for worker in self.workers:
+            worker.abort(self.stop_timeout, self.abort_timeout)
+        self._disconnect_clients(max(0, deadline - time.monotonic()))
+
+    def print_test_results(self, servers=None, statistics=None):
+        if statistics is None:
+            statistics = self._get_stats()
+        super().print_test_results(servers, statistics)
+
+
+def distributed_scenario(scenario_class):
+    """Return scenario class running given test scenario on workers."""
+    return type(
+        f"Distributed{scenario_class.__name__}",
+        (CoordinatorMixin, scenario_class),
+        {},
+    )
+
+
+def parse_args():
+    """Parse CLI arguments."""
+    parser = argparse.ArgumentParser(
+        prog="trextestdirector.distributed",
+        description="TRex Test Director worker executing coordinator commands",
+    )
+    parser.add_argument(
+        "-b",
+        "--bind",
+        default="127.0.0.1:5600",
+        help="address on which worker accepts coordinator (default: %(default)s); "
+        f"addresses other than loopback require a token in {TOKEN_VARIABLE}",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="exit after the first coordinator disconnects",
+    )
+    parser.add_argument(
+        "-l", "--log_config", help="path to a yaml file with logging configuration"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    serve(args.bind, args.once, args.log_config, os.environ.get(TOKEN_VARIABLE))
@@ -0,0 +1,107 @@
+"""Detection of traffic generator saturation from TRex global stats."""
+import logging
+from collections import OrderedDict, defaultdict
+
+from trextestdirector.utilities import requested_port_rates
+
+logger = logging.getLogger(__name__)
+
+_default_thresholds = {
+    # max TX cores utilization [%]
+    "cpu_util": 95.0,
+    # max RX core utilization [%]
+    "rx_cpu_util": 95.0,
+    # allowed relative shortfall of achieved TX rate from requested rate
+    "rate_tolerance": 0.05,
+}
+
+
+def requested_rates(transmit_config):
+    """Return requested TX rate [pps] of each server based on tunables."""
+    rates = defaultdict(float)
+    for port, requested_pps in requested_port_rates(transmit_config).items():
+        rates[port.split(":")[0]] += requested_pps
+    return rates
+
+
+class GeneratorMonitor:
+    """Samples global stats of servers during an iteration.
+
+    `start` should be called at the beginning of an iteration, `sample`
+    periodically while traffic is running and `finish` returns per server
+    utilization and saturation verdict.
+    """
+
+    def __init__(self, thresholds=None):
+        self.thresholds = {**_default_thresholds, **(thresholds or {})}
+        self._samples = defaultdict(list)
+
+    def _get_stats(self, server):
+        client = server["client"]
+        return client.get_stats([port["id"] for port in server["ports"]])
+
+    def start(self):
+        self._samples = defaultdict(list)
+
+    def sample(self, servers):
+        for server in servers:
+            global_stats = self._get_stats(server)["global"]
+            if global_stats.get("tx_pps", 0) > 0:
+                self._samples[server["name"]].append(global_stats)
+
+    def get_samples(self):
+        """Return samples taken since `start`, where server names are keys."""
+        return dict(self._samples)
+
+    def add_samples(self, samples):
+        """Add samples taken by another monitor, e.g. in a worker process."""
+        for server_name, server_samples in samples.items():
+            self._samples[server_name].extend(server_samples)
+
+    def finish(self, stats, transmit_config):
+        """Return generator utilization and saturation verdict of each server.
+
+        `stats` are per-iteration deltas of statistics, where server names are
+        keys.
+        """
+        rates = requested_rates(transmit_config)
+        generators = OrderedDict()
+        for server_name, server_stats in stats.items():
+            samples = self._samples[server_name]
+            generator = OrderedDict()
+            for field in ("cpu_util", "rx_cpu_util", "tx_pps"):
+                values = [sample.get(field, 0) for sample in samples]
+                if values:
+                    generator[f"{field}_max"] = max(values)
+                    generator[f"{field}_avg"] = sum(values) / len(values)
+                else:
+                    generator[f"{field}_max"] = generator[f"{field}_avg"] = None
+            generator["requested_pps"] = rates.get(server_name)
+            generator["queue_full"] = server_stats["global"].get("queue_full", 0)
+            generator["tx_errors"] = server_stats["total"].get("oerrors", 0)
+            generator["samples"] = len(samples)
+            generator["reasons"] = self._check(generator)
+            generator["limited"] = bool(generator["reasons"])
+            generators[server_name] = generator
+        return generators
+
+    def _check(self, generator):
+        """Return list of reasons why generator could be the bottleneck."""
+        reasons = []
+        for field in ("cpu_util", "rx_cpu_util"):
+            value = generator[f"{field}_max"]
+            if value is not None and value >= self.thresholds[field]:
+                reasons.append(f"{field} reached {value:.1f}%")
+        if generator["queue_full"] > 0:
+            reasons.append(f"TX queue full {generator['queue_full']} times")
+        if generator["tx_errors"] > 0:
+            reasons.append(f"{generator['tx_errors']} TX errors")
+        requested_pps = generator["requested_pps"]
+        achieved_pps = generator["tx_pps_avg"]
+        if requested_pps and achieved_pps is not None:
+            shortfall = 1 - achieved_pps / requested_pps
+            if shortfall > self.thresholds["rate_tolerance"]:
+                reasons.append(
+                    f"achieved {achieved_pps:.0f} pps of requested {requested_pps:.0f} pps"
+                )
+        return reasons
@@ -0,0 +1,183 @@
+"""Link level accounting of traffic sent between transmitter and receiver ports."""
+
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def _lookup(tree, *keys):
+    """Return value from nested stats, accepting both int and str keys."""
+    value = tree
+    for key in keys:
+        if not isinstance(value, dict):
+            return None
+        if key in value:
+            value = value[key]
+        elif str(key) in value:
+            value = value[str(key)]
+        else:
+            return None
+    return value
+
+
+def _port_counters(stats, tx_port, rx_port):
+    """Return port counters of transmitter and receiver ports."""
+    tx_server_name, tx_port_id = tx_port.split(":")
+    rx_server_name, rx_port_id = rx_port.split(":")
+    tx_stats = stats.get(tx_server_name, {})
+    rx_stats = stats.get(rx_server_name, {})
+    return {
+        "tx_pkts": _lookup(tx_stats, int(tx_port_id), "opackets"),
+        "rx_pkts": _lookup(rx_stats, int(rx_port_id), "ipackets"),
+        "tx_bytes": _lookup(tx_stats, int(tx_port_id), "obytes"),
+        "rx_bytes": _lookup(rx_stats, int(rx_port_id), "ibytes"),
+    }
+
+
+def _flow_stats_counters(tx_config, stats):
+    """Return counters of link's flow stats pg_id or None if link has none."""
+    tunables = tx_config.get("tunables", {})
+    pg_id = tunables.get("flow_stats_pg_id") if tunables.get("flow_stats") else None
+    if not pg_id:
+        return None
+    tx_server_name, tx_port_id = tx_config["from"].split(":")
+    rx_server_name, rx_port_id = tx_config["to"].split(":")
+    tx_stats = stats.get(tx_server_name, {})
+    rx_stats = stats.get(rx_server_name, {})
+    flow_stats = ("flow_stats", pg_id)
+    counters = {
+        "pg_id": pg_id,
+        "tx_pkts": _lookup(tx_stats, *flow_stats, "tx_pkts", int(tx_port_id)),
+        "rx_pkts": _lookup(rx_stats, *flow_stats, "rx_pkts", int(rx_port_id)),
+    }
+    tx_pkts = counters["tx_pkts"] or 0
+    counters["loss"] = tx_pkts - (counters["rx_pkts"] or 0)
+    counters["loss_ratio"] = counters["loss"] / tx_pkts if tx_pkts else 0.0
+    return counters
+
+
+def _add_loss_and_rates(link, duration):
+    """Add loss and rates to counters, which are None if unknown."""
+    tx_pkts = link["tx_pkts"]
+    rx_pkts = link["rx_pkts"]
+    if tx_pkts is None or rx_pkts is None:
+        link["loss"] = link["loss_ratio"] = None
+    else:
+        link["loss"] = tx_pkts - rx_pkts
+        link["loss_ratio"] = link["loss"] / tx_pkts if tx_pkts else 0.0
+    has_duration = duration and duration > 0
+    link["tx_pps"] = (
+        tx_pkts / duration if has_duration and tx_pkts is not None else None
+    )
+    link["rx_pps"] = (
+        rx_pkts / duration if has_duration and rx_pkts is not None else None
+    )
+    link["rx_bps"] = (
+        link["rx_bytes"] * 8 / duration
+        if has_duration and link["rx_bytes"] is not None
+        else None
+    )
+    return link
+
+
+def _sum_port_counters(stats, ports, counters):
+    """Return counters (names mapped to port stats keys) summed over ports."""
+    total = dict.fromkeys(counters, 0)
+    for port in ports:
+        server_name, port_id = port.split(":")
+        server_stats = stats.get(server_name, {})
+        for name, key in counters.items():
+            total[name] += _lookup(server_stats, int(port_id), key) or 0
+    return total
+
+
+def compute_link_stats(transmit_config, stats, duration=None):
+    """Compute per link and aggregated tx, rx, loss and achieved rate.
+
+    Links are defined by `from`/`to` pairs of test's transmit configuration.
+    Counters of transmitter and receiver ports are used, so all streams of a
+    link are counted. Counters of a port shared with other links cannot be
+    attributed to one link and are reported as None; the aggregate counts
+    every port once. Links with flow stats have counters of their pg_id
+    reported separately in `flow_stats`. Rates are averaged over traffic
+    duration in seconds.
+    """
+    # number of links using each port
+    tx_ports = OrderedDict()
+    rx_ports = OrderedDict()
+    for tx_config in transmit_config:
+        tx_ports[tx_config["from"]] = tx_ports.get(tx_config["from"], 0) + 1
+        rx_ports[tx_config["to"]] = rx_ports.get(tx_config["to"], 0) + 1
+    links = OrderedDict()
+    for tx_config in transmit_config:
+        link_name = f"{tx_config['from']}->{tx_config['to']}"
+        if link_name in links:
+            link_name = f"{link_name}#{len(links)}"
+        link = _port_counters(stats, tx_config["from"], tx_config["to"])
+        shared_tx = tx_ports[tx_config["from"]] > 1
+        shared_rx = rx_ports[tx_config["to"]] > 1
+        if shared_tx:
+            link["tx_pkts"] = link["tx_bytes"] = None
+        if shared_rx:
+            link["rx_pkts"] = link["rx_bytes"] = None
+        link["shared_ports"] = shared_tx or shared_rx
+        _add_loss_and_rates(link, duration)
+        flow_stats = _flow_stats_counters(tx_config, stats)
+        if flow_stats:
+            link["flow_stats"] = flow_stats
+        links[link_name] = link
+    aggregate = {
+        **_sum_port_counters(
+            stats, tx_ports, {"tx_pkts": "opackets", "tx_bytes": "obytes"}
+        ),
+        **_sum_port_counters(
+            stats, rx_ports, {"rx_pkts": "ipackets", "rx_bytes": "ibytes"}
+        ),
+    }
+    link_stats = {
+        "links": links,
+        "aggregate": _add_loss_and_rates(aggregate, duration),
+    }
+    rate_groups = compute_rate_groups(transmit_config, stats, duration)
+    if rate_groups:
+        link_stats["rate_groups"] = rate_groups
+    return link_stats
+
+
+def compute_rate_groups(transmit_config, stats, duration=None):
+    """Compute requested and achieved aggregate rate of distributed transmits.
+
+    Achieved rate is based on port counters of source ports, because flow
+    stats count only packets of streams with pg_id. pg_ids given to links of
+    the group are saved by "from->to" link.
+    """
+    rate_groups = OrderedDict()
+    for tx_config in transmit_config:
+        if "rate_group" not in tx_config:
+            continue
+        rate_group = rate_groups.setdefault(
+            tx_config["rate_group"],
+            {
+                "requested_pps": tx_config["rate_group_pps"],
+                "ports": [],
+                "pg_ids": OrderedDict(),
+                "tx_pkts": 0,
+            },
+        )
+        tunables = tx_config.get("tunables", {})
+        if tunables.get("flow_stats") and tunables.get("flow_stats_pg_id"):
+            link = f"{tx_config['from']}->{tx_config['to']}"
+            rate_group["pg_ids"][link] = tunables["flow_stats_pg_id"]
+        if tx_config["from"] in rate_group["ports"]:
+            continue
+        rate_group["ports"].append(tx_config["from"])
+        tx_server_name, tx_port_id = tx_config["from"].split(":")
+        tx_pkts = _lookup(stats.get(tx_server_name, {}), int(tx_port_id), "opackets")
+        rate_group["tx_pkts"] += tx_pkts or 0
+    for rate_group in rate_groups.values():
+        if duration and duration > 0:
+            rate_group["achieved_pps"] = rate_group["tx_pkts"] / duration
+        else:
+            rate_group["achieved_pps"] = None
+    return rate_groups
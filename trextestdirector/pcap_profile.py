@@ -0,0 +1,243 @@
+"""Traffic profile replaying packets captured in a pcap file.
+
+The pcap file is memory mapped and parsed record by record, so only replayed
+frames are copied to Python objects. Identical frames share one packet
+builder and runs of identical consecutive frames are sent as one burst
+stream. Streams are chained with inter stream gaps taken from capture
+timestamps, scaled by `speedup`, or from fixed `ipg_usec` or `pps`.
+"""
+import logging
+import mmap
+import os.path
+import socket
+import struct
+
+from trextestdirector.trex_stl_profile import TrexStlProfile
+
+from trex_stl_lib.api import STLPktBuilder, STLStream, STLTXSingleBurst
+
+logger = logging.getLogger(__name__)
+
+# magic number of pcap files with microsecond and nanosecond timestamps
+_pcap_magics = {0xA1B2C3D4: 1e-6, 0xA1B23C4D: 1e-9}
+_linktype_ethernet = 1
+_ethertype_ipv4 = 0x0800
+_ethertypes_vlan = (0x8100, 0x88A8)
+# offset of checksum in TCP and UDP header
+_l4_checksum_offsets = {6: 16, 17: 6}
+
+
+def read_pcap(file_name, max_packets=0):
+    """Yield (timestamp [s], frame) of Ethernet frames in a pcap file.
+
+    At most `max_packets` frames are read if it is greater than 0.
+    """
+    if os.path.getsize(file_name) < 24:
+        raise Exception(f"{file_name} is not a pcap file")
+    with open(file_name, "rb") as file_handler, mmap.mmap(
+        file_handler.fileno(), 0, access=mmap.ACCESS_READ
+    ) as pcap:
+        for byte_order in ("<", ">"):
+            (magic,) = struct.unpack_from(f"{byte_order}I", pcap)
+            if magic in _pcap_magics:
+                break
+        else:
+            raise Exception(f"{file_name} is not a pcap file (pcapng is not supported)")
+        resolution = _pcap_magics[magic]
+        (linktype,) = struct.unpack_from(f"{byte_order}I", pcap, 20)
+        if linktype & 0xFFFF != _linktype_ethernet:
+            raise Exception(f"{file_name}: only Ethernet captures can be replayed")
+        record_header = struct.Struct(f"{byte_order}IIII")
+        offset = 24
+        count = 0
+        truncated = 0
+        while offset + record_header.size <= len(pcap):
+            if max_packets and count >= max_packets:
+                break
+            ts_sec, ts_frac, captured_len, original_len = record_header.unpack_from(
+                pcap, offset
+            )
+            offset += record_header.size
+            if offset + captured_len > len(pcap):
+                logger.warning(f"{file_name}: last record is incomplete")
+                break
+            truncated += captured_len < original_len
+            yield ts_sec + ts_frac * resolution, pcap[offset : offset + captured_len]
+            offset += captured_len
+            count += 1
+        if truncated:
+            logger.warning(f"{file_name}: {truncated} frames were captured truncated")
+
+
+def _checksum(data):
+    """Return Internet checksum of data."""
+    if len(data) % 2:
+        data += b"\0"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    while total >> 16:
+        total = (total & 0xFFFF) + (total >> 16)
+    return ~total & 0xFFFF
+
+
+def _update_checksum(checksum, old, new):
+    """Return checksum updated for `old` bytes replaced by `new` (RFC 1624)."""
+    total = ~checksum & 0xFFFF
+    for idx in range(0, len(old), 2):
+        total += ~int.from_bytes(old[idx : idx + 2], "big") & 0xFFFF
+        total += int.from_bytes(new[idx : idx + 2], "big")
+    while total >> 16:
+        total = (total & 0xFFFF) + (total >> 16)
+    return ~total & 0xFFFF
+
+
+def rewrite_ipv4(frame, src_ip=None, dst_ip=None):
+    """Return frame with IPv4 addresses replaced by packed `src_ip`/`dst_ip`.
+
+    IP header checksum is recomputed and TCP/UDP checksum is updated
+    incrementally. Frames other than IPv4 are returned unchanged.
+    """
+    l3_offset = 14
+    if len(frame) < l3_offset:
+        return frame
+    (ethertype,) = struct.unpack_from("!H", frame, 12)
+    while ethertype in _ethertypes_vlan and len(frame) >= l3_offset + 4:
+        (ethertype,) = struct.unpack_from("!H", frame, l3_offset + 2)
+        l3_offset += 4
+    if ethertype != _ethertype_ipv4 or len(frame) < l3_offset + 20:
+        return frame
+    header_len = (frame[l3_offset] & 0x0F) * 4
+    if header_len < 20 or len(frame) < l3_offset + header_len:
+        return frame
+    old_addresses = bytes(frame[l3_offset + 12 : l3_offset + 20])
+    new_addresses = (src_ip or old_addresses[:4]) + (dst_ip or old_addresses[4:])
+    if new_addresses == old_addresses:
+        return frame
+    packet = bytearray(frame)
+    packet[l3_offset + 12 : l3_offset + 20] = new_addresses
+    packet[l3_offset + 10 : l3_offset + 12] = b"\0\0"
+    ip_checksum = _checksum(bytes(packet[l3_offset : l3_offset + header_len]))
+    struct.pack_into("!H", packet, l3_offset + 10, ip_checksum)
+    protocol = packet[l3_offset + 9]
+    (fragment,) = struct.unpack_from("!H", packet, l3_offset + 6)
+    checksum_offset = _l4_checksum_offsets.get(protocol)
+    # only the first fragment carries L4 header
+    if checksum_offset is not None and not fragment & 0x1FFF:
+        checksum_offset += l3_offset + header_len
+        if len(packet) >= checksum_offset + 2:
+            (l4_checksum,) = struct.unpack_from("!H", packet, checksum_offset)
+            # zero UDP checksum means that checksum is not used
+            if protocol != 17 or l4_checksum:
+                l4_checksum = _update_checksum(
+                    l4_checksum, old_addresses, new_addresses
+                )
+                if protocol == 17 and not l4_checksum:
+                    l4_checksum = 0xFFFF
+                struct.pack_into("!H", packet, checksum_offset, l4_checksum)
+    return bytes(packet)
+
+
+class PcapReplayProfile(TrexStlProfile):
+    """Replays Ethernet frames captured in `pcap_file`."""
+
+    def __init__(self):
+        self.tunables = {
+            "pcap_file": None,
+            # max frames read from the file, 0 reads all frames
+            "max_packets": 100000,
+            # number of replays of the capture, 0 replays it until traffic stops
+            "loop_count": 1,
+            # scale of capture timing, e.g. 2 replays twice as fast
+            "speedup": 1.0,
+            # fixed gap between frames instead of capture timing [us]
+            "ipg_usec": None,
+            # fixed rate instead of capture timing
+            "pps": None,
+            # IP addresses of IPv4 frames are rewritten unless disabled
+            "rewrite_ips": True,
+            "src_ip": None,
+            "dst_ip": None,
+        }
+
+    def _read_frames(self):
+        """Return list of [frame, count, first timestamp, last timestamp] runs."""
+        rewrite = self.tunables["rewrite_ips"]
+        src_ip = self.tunables["src_ip"]
+        dst_ip = self.tunables["dst_ip"]
+        src_ip = socket.inet_aton(src_ip) if rewrite and src_ip else None
+        dst_ip = socket.inet_aton(dst_ip) if rewrite and dst_ip else None
+        unique_frames = {}
+        runs = []
+        for timestamp, frame in read_pcap(
+            self.tunables["pcap_file"], self.tunables["max_packets"]
+        ):
+            if src_ip or dst_ip:
+                frame = rewrite_ipv4(frame, src_ip, dst_ip)
+            frame = unique_frames.setdefault(frame, frame)
+            if runs and runs[-1][0] is frame:
+                runs[-1][1] += 1
+                runs[-1][3] = timestamp
+            else:
+                runs.append([frame, 1, timestamp, timestamp])
+        logger.debug(
+            f"{self.tunables['pcap_file']}: {sum(run[1] for run in runs)} frames, "
+            f"{len(unique_frames)} unique, {len(runs)} streams"
+        )
+        return runs
+
+    def _fixed_gap(self):
+        """Return fixed gap between frames [us] or None to use capture timing."""
+        if self.tunables["ipg_usec"]:
+            return float(self.tunables["ipg_usec"])
+        if self.tunables["pps"]:
+            return 1e6 / self.tunables["pps"]
+        return None
+
+    def create_streams(self):
+        if not self.tunables["pcap_file"]:
+            raise Exception("pcap_file tunable is required by pcap replay profile")
+        runs = self._read_frames()
+        if not runs:
+            raise Exception(f"{self.tunables['pcap_file']} contains no frames")
+        fixed_gap = self._fixed_gap()
+        speedup = float(self.tunables["speedup"])
+        loop_count = self.tunables["loop_count"]
+        builders = {}
+        streams = []
+        for idx, (frame, count, first_ts, last_ts) in enumerate(runs):
+            last = idx + 1 == len(runs)
+            loop = {}
+            if not last:
+                loop["next"] = f"pcap_{idx + 1}"
+            elif loop_count != 1:
+                # action_count 0 makes TRex loop until traffic is stopped
+                loop["next"] = "pcap_0"
+                loop["action_count"] = max(0, loop_count - 1)
+            if fixed_gap is not None:
+                isg = fixed_gap if idx else 0
+                burst_gap = fixed_gap
+            else:
+                isg = (first_ts - runs[idx - 1][3]) * 1e6 / speedup if idx else 0
+                burst_gap = (last_ts - first_ts) * 1e6 / speedup / max(1, count - 1)
+            if burst_gap > 0:
+                mode = STLTXSingleBurst(total_pkts=count, pps=1e6 / burst_gap)
+            else:
+                mode = STLTXSingleBurst(total_pkts=count, percentage=100)
+            if frame not in builders:
+                builders[frame] = STLPktBuilder(pkt_buffer=frame)
+            streams.append(
+                STLStream(
+                    name=f"pcap_{idx}",
+                    packet=builders[frame],
+                    mode=mode,
+                    isg=max(0, isg),
+                    self_start=not idx,
+                    **loop,
+                )
+            )
+        return streams
+
+
+# dynamic load - used for trex console or simulator
+def register():
+    """Register profile."""
+    return PcapReplayProfile()
@@ -0,0 +1,162 @@
+"""Precompilation of traffic profiles to JSON stream definitions.
+
+Every (profile file, tunables, port) combination used in a configuration is
+loaded ahead of time and its streams are saved as JSON. Entries are keyed by
+a hash of tunables, port id and content of the profile file, Python modules
+next to it and files named by tunables (e.g. a pcap file), so a changed
+profile, its dependency or configuration does not match a stale entry.
+Files are hashed in chunks and their digests are cached by path, modification
+time and size, so large files (e.g. a pcap file) are read once per run.
+Splits of `total_pps` and `flows` across ports are saved as well and reused
+when precompiled profiles are loaded.
+"""
+import glob
+import hashlib
+import json
+import logging
+import os.path
+
+from trex.stl.api import STLProfile, STLStream
+from trextestdirector.errors import TrexTestDirectorError
+from trextestdirector.trex_stl_scenario import TrexStlScenario
+from trextestdirector.utilities import iter_tests
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_VERSION = 3
+# size of chunks in which files are hashed [B]
+_digest_chunk = 1024 * 1024
+# sha256 digests of files by (path, modification time, size)
+_file_digests = {}
+
+
+def _dependency_files(profile_file, tunables):
+    """Return files which streams of profile loaded with tunables depend on."""
+    directory = os.path.dirname(os.path.abspath(profile_file))
+    files = sorted(glob.glob(os.path.join(directory, "*.py")))
+    files += sorted(
+        value
+        for value in tunables.values()
+        if isinstance(value, str) and os.path.isfile(value)
+    )
+    return files
+
+
+def _file_digest(file_name):
+    """Return sha256 digest of file content."""
+    stat = os.stat(file_name)
+    key = (os.path.abspath(file_name), stat.st_mtime_ns, stat.st_size)
+    if key not in _file_digests:
+        digest = hashlib.sha256()
+        with open(file_name, "rb") as file_handler:
+            for chunk in iter(lambda: file_handler.read(_digest_chunk), b""):
+                digest.update(chunk)
+        _file_digests[key] = digest.digest()
+    return _file_digests[key]
+
+
+def profile_key(profile_file, tunables, port_id):
+    """Return hash identifying streams of profile loaded with tunables on port."""
+    digest = hashlib.sha256()
+    digest.update(_file_digest(profile_file))
+    for file_name in _dependency_files(profile_file, tunables):
+        digest.update(os.path.basename(file_name).encode())
+        digest.update(_file_digest(file_name))
+    digest.update(json.dumps(tunables, sort_keys=True, default=str).encode())
+    digest.update(str(port_id).encode())
+    return digest.hexdigest()
+
+
+class _CompileScenario(TrexStlScenario):
+    """Scenario used only to resolve traffic profiles of tests."""
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.rate_weights = {}
+
+    def _rate_weights(self, test_name, rate_group, tx_ports):
+        weights = super()._rate_weights(test_name, rate_group, tx_ports)
+        self.rate_weights.setdefault(test_name, {})[rate_group] = weights
+        return weights
+
+    def test(self):
+        pass
+
+
+def compile_profiles(config, file_name):
+    """Resolve all traffic profiles of config and save their streams."""
+    scenario = _CompileScenario(config)
+    profiles = {}
+    for test_config in iter_tests(scenario.tests):
+        scenario.transmit = scenario._resolve_transmit(test_config)
+        plan = scenario._plan_traffic_profiles(test_config)
+        for (server_name, port_id), streams in plan.items():
+            for stream in streams:
+                if stream[0] != "profile":
+                    continue
+                _, profile_file, tunables = stream
+                key = profile_key(profile_file, tunables, port_id)
+                if key in profiles:
+                    continue
+                profile = STLProfile.load(profile_file, port_id=port_id, **tunables)
+                profiles[key] = {
+                    "profile_file": profile_file,
+                    "tunables": tunables,
+                    "port_id": port_id,
+                    "streams": [
+                        {
+                            "name": stl_stream.get_name(),
+                            "next": stl_stream.get_next(),
+                            "fields": stl_stream.to_json(),
+                        }
+                        for stl_stream in profile.get_streams()
+                    ],
+                }
+                logger.info(
+                    f"{test_config['name']}: compiled {profile_file} for {server_name} port {port_id}"
+                )
+    with open(file_name, "w+") as file_handler:
+        json.dump(
+            {
+                "version": ARTIFACT_VERSION,
+                "profiles": profiles,
+                "rate_weights": scenario.rate_weights,
+            },
+            file_handler,
+        )
+    logger.info(f"{len(profiles)} profiles compiled to {file_name}")
+
+
+class PrecompiledProfiles:
+    """Streams loaded from precompiled profiles artifact."""
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        with open(file_name, "rt") as file_handler:
+            artifact = json.load(file_handler)
+        if artifact.get("version") != ARTIFACT_VERSION:
+            raise TrexTestDirectorError(
+                f"Unsupported precompiled profiles version in {file_name}"
+            )
+        self.profiles = artifact["profiles"]
+        self.rate_weights = artifact["rate_weights"]
+
+    def get_rate_weights(self, test_name, rate_group):
+        """Return weights used to split rate group at compile time or None."""
+        return self.rate_weights.get(test_name, {}).get(rate_group)
+
+    def get_streams(self, profile_file, tunables, port_id):
+        """Return list of streams or None if profile was not precompiled."""
+        profile = self.profiles.get(profile_key(profile_file, tunables, port_id))
+        if not profile:
+            logger.warning(
+                f"{profile_file} with tunables {tunables} for port {port_id} is not precompiled or has changed"
+            )
+            return None
+        streams = []
+        for stream in profile["streams"]:
+            stl_stream = STLStream.from_json(stream["fields"])
+            stl_stream.name = stream["name"]
+            stl_stream.next = stream["next"]
+            streams.append(stl_stream)
+        return streams
@@ -0,0 +1,254 @@
+"""Sampled RX capture and analysis of packets delivered by the DUT.
+
+Packets received on selected ports are captured by TRex during each
+iteration. A capture keeps at most `limit` packets per port (the first ones
+in "fixed" mode, the last ones in "cyclic" mode) and at most `max_bytes` of
+packet data are fetched from the server. Only timestamps and sequence numbers
+embedded in packets at `seq_offset` are kept, decoded to numpy arrays, from
+which inter-arrival jitter, burst lengths, reordering depth, duplicates and
+missing packets are computed.
+
+TRex captures packets only on ports in service mode, so captured ports that
+are not in service mode are switched to it for the iteration. In service
+mode all received packets go through the RX core, which limits the rate the
+port can receive at.
+
+This module requires numpy.
+"""
+import logging
+from collections import OrderedDict
+
+from trextestdirector.errors import TrexTestDirectorError
+from trextestdirector.tracing import span
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+logger = logging.getLogger(__name__)
+
+_default_settings = {
+    # max captured packets per port
+    "limit": 10000,
+    # max bytes of packets fetched from a port
+    "max_bytes": 64 * 1024 * 1024,
+    # "fixed" keeps the first packets, "cyclic" the last ones
+    "mode": "fixed",
+    "bpf_filter": "",
+    # byte offset and size of a big-endian sequence number in packets
+    "seq_offset": None,
+    "seq_size": 4,
+    # packets closer to each other than the gap belong to one burst [us]
+    "burst_gap_us": 10.0,
+    "percentiles": [50, 90, 99, 99.9],
+}
+
+# packets fetched from a server at once
+_fetch_batch = 1000
+
+
+def _require_numpy():
+    if numpy is None:
+        raise TrexTestDirectorError("RX capture requires numpy: pip3 install numpy")
+
+
+def decode_packets(packets, seq_offset=None, seq_size=4):
+    """Return arrays of timestamps [s] and sequence numbers of packets.
+
+    Packets too short to hold a sequence number are skipped. Sequence numbers
+    are None if `seq_offset` is not defined.
+    """
+    if seq_offset is None:
+        timestamps = numpy.fromiter(
+            (packet["ts"] for packet in packets), dtype="f8", count=len(packets)
+        )
+        return timestamps, None
+    seq_end = seq_offset + seq_size
+    packets = [packet for packet in packets if len(packet["binary"]) >= seq_end]
+    timestamps = numpy.fromiter(
+        (packet["ts"] for packet in packets), dtype="f8", count=len(packets)
+    )
+    data = b"".join(packet["binary"][seq_offset:seq_end] for packet in packets)
+    sequence = numpy.frombuffer(data, dtype=f">u{seq_size}").astype("i8")
+    return timestamps, sequence
+
+
+def _distribution(values, percentiles):
+    if not len(values):
+        return None
+    distribution = OrderedDict(
+        [
+            ("min", float(values.min())),
+            ("avg", float(values.mean())),
+            ("max", float(values.max())),
+        ]
+    )
+    for percentile, value in zip(percentiles, numpy.percentile(values, percentiles)):
+        distribution[f"p{percentile:g}"] = float(value)
+    return distribution
+
+
+def analyze(timestamps, sequence=None, burst_gap_us=10.0, percentiles=(50, 99)):
+    """Return inter-arrival, burst and sequence analysis of captured packets.
+
+    Packets are analyzed in arrival order. Jitter is the absolute difference
+    of consecutive inter-arrival times. A packet is reordered if it arrives
+    after a packet with a greater sequence number; its reordering depth is
+    the difference of these sequence numbers.
+    """
+    analysis = OrderedDict([("packets", int(len(timestamps)))])
+    inter_arrival = numpy.diff(timestamps) * 1e6
+    analysis["inter_arrival_us"] = _distribution(inter_arrival, percentiles)
+    analysis["jitter_us"] = _distribution(
+        numpy.abs(numpy.diff(inter_arrival)), percentiles
+    )
+    if len(timestamps):
+        # bursts are delimited by inter-arrival times longer than the gap
+        edges = numpy.flatnonzero(
+            numpy.concatenate(([True], inter_arrival > burst_gap_us, [True]))
+        )
+        burst_lengths = numpy.diff(edges)
+        analysis["bursts"] = int(len(burst_lengths))
+        analysis["burst_length"] = _distribution(burst_lengths, percentiles)
+    else:
+        analysis["bursts"] = 0
+        analysis["burst_length"] = None
+    if sequence is None:
+        return analysis
+    unique, first_idx = numpy.unique(sequence, return_index=True)
+    analysis["duplicates"] = int(len(sequence) - len(unique))
+    analysis["missing"] = (
+        int(unique[-1] - unique[0] + 1 - len(unique)) if len(unique) else 0
+    )
+    # duplicates are not counted as reordered packets
+    first = numpy.zeros(len(sequence), dtype=bool)
+    first[first_idx] = True
+    previous_max = numpy.maximum.accumulate(sequence)
+    previous_max = numpy.concatenate(([numpy.iinfo("i8").min], previous_max[:-1]))
+    depth = (previous_max - sequence)[first & (sequence < previous_max)]
+    analysis["reordered"] = int(len(depth))
+    analysis["reorder_depth"] = _distribution(depth, percentiles)
+    return analysis
+
+
+class RxCapture:
+    """Captures packets received on "server:port" `ports` during an iteration.
+
+    `start` should be called before traffic is started and `finish` after
+    traffic stops; it returns analysis of each captured port. Service mode
+    enabled by `start` is disabled again by `finish`.
+    """
+
+    def __init__(self, settings, ports):
+        _require_numpy()
+        self.settings = {**_default_settings, **settings}
+        self.ports = ports
+        self._captures = OrderedDict()
+        # (client, port ids) switched to service mode for the capture
+        self._service_mode = []
+
+    def start(self, servers):
+        self._captures = OrderedDict()
+        self._service_mode = []
+        try:
+            for server in servers:
+                self._start_server(server)
+        except Exception:
+            self._stop_captures()
+            self._restore_service_mode()
+            raise
+
+    def _start_server(self, server):
+        client = server["client"]
+        port_ids = [
+            int(port.split(":")[1])
+            for port in self.ports
+            if port.split(":")[0] == server["name"]
+        ]
+        if not port_ids:
+            return
+        # capture requires service mode
+        disabled = [
+            port_id
+            for port_id in port_ids
+            if not client.get_port(port_id).is_service_mode_on()
+        ]
+        if disabled:
+            logger.debug(f"{server['name']}: service mode enabled on {disabled}")
+            client.set_service_mode(disabled, enabled=True)
+            self._service_mode.append((client, disabled))
+        for port_id in port_ids:
+            port = f"{server['name']}:{port_id}"
+            # one capture per port, so every port gets its own limit
+            capture = client.start_capture(
+                rx_ports=[port_id],
+                limit=self.settings["limit"],
+                mode=self.settings["mode"],
+                bpf_filter=self.settings["bpf_filter"],
+            )
+            self._captures[port] = (client, capture["id"])
+            logger.debug(f"{port}: RX capture {capture['id']} started")
+
+    def _stop_captures(self):
+        for port, (client, capture_id) in self._captures.items():
+            try:
+                client.stop_capture(capture_id)
+            except Exception as e:
+                logger.error(f"{port}: cannot stop RX capture: {e}")
+        self._captures = OrderedDict()
+
+    def _restore_service_mode(self):
+        for client, port_ids in self._service_mode:
+            try:
+                client.set_service_mode(port_ids, enabled=False)
+            except Exception as e:
+                logger.error(f"Cannot disable service mode on {port_ids}: {e}")
+        self._service_mode = []
+
+    def _fetch(self, port, client, capture_id):
+        """Fetch packets until capture is empty or `max_bytes` are fetched."""
+        timestamps = []
+        sequences = []
+        fetched_bytes = 0
+        while fetched_bytes < self.settings["max_bytes"]:
+            packets = []
+            client.fetch_capture_packets(capture_id, packets, _fetch_batch)
+            if not packets:
+                break
+            fetched_bytes += sum(len(packet["binary"]) for packet in packets)
+            timestamps_batch, sequence_batch = decode_packets(
+                packets, self.settings["seq_offset"], self.settings["seq_size"]
+            )
+            timestamps.append(timestamps_batch)
+            if sequence_batch is not None:
+                sequences.append(sequence_batch)
+        else:
+            logger.warning(
+                f"{port}: fetched {fetched_bytes} bytes of captured packets, the rest is skipped"
+            )
+        timestamps = numpy.concatenate(timestamps) if timestamps else numpy.empty(0)
+        if self.settings["seq_offset"] is None:
+            return timestamps, None
+        sequence = (
+            numpy.concatenate(sequences) if sequences else numpy.empty(0, dtype="i8")
+        )
+        return timestamps, sequence
+
+    def finish(self):
+        """Stop captures and return analysis of each captured port."""
+        results = OrderedDict()
+        try:
+            for port, (client, capture_id) in self._captures.items():
+                with span("rx_capture_fetch", port=port):
+                    timestamps, sequence = self._fetch(port, client, capture_id)
+                results[port] = analyze(
+                    timestamps,
+                    sequence,
+                    self.settings["burst_gap_us"],
+                    self.settings["percentiles"],
+                )
+        finally:
+            self._stop_captures()
+            self._restore_service_mode()
+        return results
@@ -0,0 +1,51 @@
+"""Per-iteration deltas of cumulative TRex statistics."""
+
+# Counters accumulated by TRex since the last clear_stats. Other numeric values
+# (rates, utilization, min/max/average latency) are taken from the end snapshot.
+_counter_fields = frozenset(
+    [
+        "opackets",
+        "ipackets",
+        "obytes",
+        "ibytes",
+        "oerrors",
+        "ierrors",
+        "queue_full",
+        "rx_drop",
+        "tx_pkts",
+        "rx_pkts",
+        "tx_bytes",
+        "rx_bytes",
+        # latency stats counters
+        "err_cntrs",
+        "histogram",
+    ]
+)
+
+
+def _delta(start, end, is_counter):
+    if isinstance(end, dict):
+        start = start if isinstance(start, dict) else {}
+        return {
+            key: _delta(
+                start.get(key), value, is_counter or key in _counter_fields
+            )
+            for key, value in end.items()
+        }
+    if (
+        is_counter
+        and isinstance(end, (int, float))
+        and isinstance(start, (int, float))
+        and not isinstance(end, bool)
+    ):
+        return end - start
+    return end
+
+
+def delta_stats(start, end):
+    """Return stats with counters of `end` snapshot decreased by `start` snapshot.
+
+    Only dicts are rebuilt, leaf values of `end` are reused, so snapshots are
+    not copied.
+    """
+    return _delta(start, end, False)
@@ -3,6 +3,7 @@ import time
 from abc import ABC
 from collections import OrderedDict
 
+from trextestdirector.tracing import span
 from trextestdirector.utilities import format_num
 
 from trex.common.stats.trex_global_stats import GlobalStats
@@ -216,21 +217,206 @@ class TrexLatencyStats(TrexStats):
         return stats_table
 
 
-def print_port_stats(server, buffer=sys.stdout):
+class TrexLinkStats(TrexStats):
+    def __init__(self, stats):
+        super().__init__(stats)
+
+    def to_table(self):
+        links = OrderedDict(self.stats["links"])
+        links["aggregate"] = self.stats["aggregate"]
+        stats_table = text_tables.TRexTextTable("Link statistics")
+        stats_table.set_cols_align(["l"] + ["r"] * len(links))
+        stats_table.set_cols_width([10] + [max(17, len(name)) for name in links])
+        stats_table.set_cols_dtype(["t"] + ["t"] * len(links))
+        stats_table.header(["link"] + list(links))
+        links = list(links.values())
+        stats_data = OrderedDict(
+            [
+                ("TX pkts", [self._format(link["tx_pkts"]) for link in links]),
+                ("RX pkts", [self._format(link["rx_pkts"]) for link in links]),
+                ("Loss", [self._format(link["loss"]) for link in links]),
+                ("Loss ratio", [self._ratio(link["loss_ratio"]) for link in links]),
+                ("---", [""] * len(links)),
+                ("TX rate", [self._format(link["tx_pps"], "pps") for link in links]),
+                ("RX rate", [self._format(link["rx_pps"], "pps") for link in links]),
+                ("RX bps", [self._format(link["rx_bps"], "bps") for link in links]),
+            ]
+        )
+        rows = [[k] + v for k, v in stats_data.items()]
+        # loss of streams with flow stats, printed only if any link has them
+        flow_stats = [link.get("flow_stats") for link in links]
+        if any(flow_stats):
+            rows.append(["---"] + [""] * len(links))
+            for name, key, format_value in (
+                ("PG ID", "pg_id", str),
+                ("PG loss", "loss", self._format),
+                ("PG loss ratio", "loss_ratio", self._ratio),
+            ):
+                rows.append(
+                    [name]
+                    + [format_value(stats[key]) if stats else "" for stats in flow_stats]
+                )
+        stats_table.add_rows(rows, header=False)
+        return stats_table
+
+    @staticmethod
+    def _format(value, unit=""):
+        if value is None:
+            return "N/A"
+        return format_num(value, unit)
+
+    @staticmethod
+    def _ratio(value):
+        if value is None:
+            return "N/A"
+        return "{:.6f} %".format(value * 100)
+
+
+class TrexGeneratorStats(TrexStats):
+    def __init__(self, stats):
+        super().__init__(stats)
+
+    def to_table(self):
+        server_names = list(self.stats)
+        stats_table = text_tables.TRexTextTable("Generator statistics")
+        stats_table.set_cols_align(["l"] + ["r"] * len(server_names))
+        stats_table.set_cols_width([14] + [max(14, len(name)) for name in server_names])
+        stats_table.set_cols_dtype(["t"] + ["t"] * len(server_names))
+        stats_table.header(["server"] + server_names)
+        stats_data = OrderedDict(
+            [
+                ("TX CPU max", ("cpu_util_max", "%")),
+                ("TX CPU avg", ("cpu_util_avg", "%")),
+                ("RX CPU max", ("rx_cpu_util_max", "%")),
+                ("TX rate avg", ("tx_pps_avg", "pps")),
+                ("Requested rate", ("requested_pps", "pps")),
+                ("Queue full", ("queue_full", "")),
+                ("TX errors", ("tx_errors", "")),
+                ("Limited", ("limited", "")),
+            ]
+        )
+        for row_name, (field, unit) in stats_data.items():
+            row = [row_name]
+            for server_name in server_names:
+                value = self.get([server_name, field])
+                if isinstance(value, bool):
+                    value = "yes" if value else "no"
+                elif isinstance(value, (int, float)):
+                    value = format_num(value, unit)
+                row.append(value)
+            stats_table.add_row(row)
+        return stats_table
+
+
+class TrexRxCaptureStats(TrexStats):
+    def __init__(self, stats):
+        super().__init__(stats)
+
+    def _get_path(self, path):
+        value = self.stats
+        for level in path:
+            if not isinstance(value, dict) or level not in value:
+                return None
+            value = value[level]
+        return value
+
+    def to_table(self):
+        ports = list(self.stats)
+        stats_table = text_tables.TRexTextTable("RX capture statistics")
+        stats_table.set_cols_align(["l"] + ["r"] * len(ports))
+        stats_table.set_cols_width([18] + [max(14, len(port)) for port in ports])
+        stats_table.set_cols_dtype(["t"] + ["t"] * len(ports))
+        stats_table.header(["port"] + ports)
+        stats_data = OrderedDict(
+            [
+                ("Packets", (["packets"], "")),
+                ("Inter-arrival avg", (["inter_arrival_us", "avg"], "us")),
+                ("Jitter avg", (["jitter_us", "avg"], "us")),
+                ("Jitter max", (["jitter_us", "max"], "us")),
+                ("Bursts", (["bursts"], "")),
+                ("Burst length max", (["burst_length", "max"], "")),
+                ("Reordered", (["reordered"], "")),
+                ("Reorder depth max", (["reorder_depth", "max"], "")),
+                ("Duplicates", (["duplicates"], "")),
+                ("Missing", (["missing"], "")),
+            ]
+        )
+        for row_name, (path, unit) in stats_data.items():
+            row = [row_name]
+            for port in ports:
+                value = self._get_path([port] + path)
+                row.append("N/A" if value is None else format_num(value, unit))
+            stats_table.add_row(row)
+        return stats_table
+
+
+def print_port_stats(server, buffer=sys.stdout, stats=None):
     client = server["client"]
     port_ids = [port["id"] for port in server["ports"]]
-    stats = client.get_stats(port_ids)
+    if stats is None:
+        with span("stats_fetch", server=server["name"]):
+            stats = client.get_stats(port_ids)
 
-    tables = [TrexPortStats(stats[port_id], port_id).to_table() for port_id in port_ids]
-    if len(port_ids) > 1:
-        tables.append(TrexPortStats(stats["total"], "total").to_table())
-    table = text_tables.TRexTextTable.merge(tables)
-    text_tables.print_table_with_header(table, table.title, buffer=buffer)
+    with span("table_render", server=server["name"], table="port"):
+        tables = [
+            TrexPortStats(stats[port_id], port_id).to_table() for port_id in port_ids
+        ]
+        if len(port_ids) > 1:
+            tables.append(TrexPortStats(stats["total"], "total").to_table())
+        table = text_tables.TRexTextTable.merge(tables)
+        text_tables.print_table_with_header(table, table.title, buffer=buffer)
 
 
-def print_latency_stats(server, buffer=sys.stdout):
+def print_latency_stats(server, buffer=sys.stdout, stats=None):
     client = server["client"]
     port_ids = [port["id"] for port in server["ports"]]
-    stats = TrexLatencyStats(client.get_stats(port_ids))
-    table = stats.to_table()
-    text_tables.print_table_with_header(table, table.title, buffer=buffer)
+    if stats is None:
+        with span("stats_fetch", server=server["name"]):
+            stats = client.get_stats(port_ids)
+    stats = TrexLatencyStats(stats)
+    with span("table_render", server=server["name"], table="latency"):
+        table = stats.to_table()
+        text_tables.print_table_with_header(table, table.title, buffer=buffer)
+
+
+def print_link_stats(link_stats, stats, buffer=sys.stdout):
+    """Print per link statistics and cluster-wide port totals."""
+    with span("table_render", table="link"):
+        table = TrexLinkStats(link_stats).to_table()
+        text_tables.print_table_with_header(table, table.title, buffer=buffer)
+        cluster_stats = TrexPortStatsSum({})
+        for server_name, server_stats in stats.items():
+            if "total" in server_stats:
+                cluster_stats += TrexPortStats(server_stats["total"])
+        cluster_stats.port_id = "cluster"
+        table = cluster_stats.to_table()
+        text_tables.print_table_with_header(table, "Cluster statistics", buffer=buffer)
+    for rate_group_name, rate_group in link_stats.get("rate_groups", {}).items():
+        achieved = TrexLinkStats._format(rate_group["achieved_pps"], "pps")
+        requested = TrexLinkStats._format(rate_group["requested_pps"], "pps")
+        ports = len(rate_group["ports"])
+        print(
+            f"{rate_group_name}: achieved {achieved} of requested {requested} on {ports} ports",
+            file=buffer,
+        )
+
+
+def print_generator_stats(summary, buffer=sys.stdout):
+    """Print generators utilization and warn if results are generator-limited."""
+    with span("table_render", table="generator"):
+        table = TrexGeneratorStats(summary["generator"]).to_table()
+        text_tables.print_table_with_header(table, table.title, buffer=buffer)
+    for server_name, generator in summary["generator"].items():
+        if generator["limited"]:
+            reasons = ", ".join(generator["reasons"])
+            print(
+                f"WARNING: results are generator-limited by {server_name}: {reasons}",
+                file=buffer,
+            )
+
+
+def print_rx_capture_stats(summary, buffer=sys.stdout):
+    """Print analysis of packets captured on RX ports."""
+    with span("table_render", table="rx_capture"):
+        table = TrexRxCaptureStats(summary["rx_capture"]).to_table()
+        text_tables.print_table_with_header(table, table.title, buffer=buffer)
@@ -0,0 +1,185 @@
+"""Span based timing instrumentation of TRex Test Director phases.
+
+Instrumentation is disabled by default and then `span` returns a shared no-op
+context manager. When enabled, every span is recorded with its tags and can be
+exported to Chrome trace event format (chrome://tracing, Perfetto). Tags set
+with `tagged` (e.g. test and iteration) are added to all spans started inside
+the block. Spans recorded in other processes (e.g. distributed workers) can be
+merged with `export_spans` and `add_spans`.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_null_span = _NullSpan()
+
+
+class _Span:
+    def __init__(self, tracer, name, tags):
+        self.tracer = tracer
+        self.name = name
+        self.tags = {**tracer.context_tags(), **tags}
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = time.perf_counter()
+        self.tracer.record(self.name, self.start, end - self.start, self.tags)
+        return False
+
+
+class Tracer:
+    """Collects timing spans of TRex Test Director phases."""
+
+    def __init__(self):
+        self.enabled = False
+        self.spans = []
+        self._lock = threading.Lock()
+        # stack of tags added to all spans, shared by threads of the process
+        self._context = []
+        # wall-clock time of perf_counter zero, which differs between processes
+        self._epoch = time.time() - time.perf_counter()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def span(self, name, **tags):
+        """Return context manager measuring time of the enclosed block."""
+        if not self.enabled:
+            return _null_span
+        return _Span(self, name, tags)
+
+    @contextmanager
+    def tagged(self, **tags):
+        """Add tags to all spans started inside the block."""
+        self._context.append(tags)
+        try:
+            yield
+        finally:
+            self._context.remove(tags)
+
+    def context_tags(self):
+        tags = {}
+        for context in list(self._context):
+            tags.update(context)
+        return tags
+
+    def record(self, name, start, duration, tags):
+        with self._lock:
+            self.spans.append(
+                (name, start, duration, os.getpid(), threading.get_ident(), tags)
+            )
+
+    def export_spans(self):
+        """Return and forget recorded spans with wall-clock start times."""
+        with self._lock:
+            spans, self.spans = self.spans, []
+        return [
+            {
+                "name": name,
+                "start": start + self._epoch,
+                "duration": duration,
+                "pid": pid,
+                "tid": thread_id,
+                "tags": {key: str(value) for key, value in tags.items()},
+            }
+            for name, start, duration, pid, thread_id, tags in spans
+        ]
+
+    def add_spans(self, spans):
+        """Add spans exported by a tracer of another process."""
+        with self._lock:
+            for span in spans:
+                self.spans.append(
+                    (
+                        span["name"],
+                        span["start"] - self._epoch,
+                        span["duration"],
+                        span["pid"],
+                        span["tid"],
+                        span["tags"],
+                    )
+                )
+
+    def to_chrome_trace(self):
+        """Return spans as a Chrome trace event format dict."""
+        events = []
+        for name, start, duration, pid, thread_id, tags in self.spans:
+            events.append(
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": start * 1e6,
+                    "dur": duration * 1e6,
+                    "pid": pid,
+                    "tid": thread_id,
+                    "args": {key: str(value) for key, value in tags.items()},
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save(self, file_name):
+        with open(file_name, "w+") as file_handler:
+            json.dump(self.to_chrome_trace(), file_handler)
+
+    def summary(self):
+        """Return count, total, average and max duration of spans by name."""
+        durations = OrderedDict()
+        for name, _, duration, _, _, _ in self.spans:
+            durations.setdefault(name, []).append(duration)
+        return OrderedDict(
+            (
+                name,
+                {
+                    "count": len(values),
+                    "total": sum(values),
+                    "avg": sum(values) / len(values),
+                    "max": max(values),
+                },
+            )
+            for name, values in durations.items()
+        )
+
+    def print_summary(self, buffer=sys.stdout):
+        summary = self.summary()
+        header = ["phase", "count", "total [s]", "avg [s]", "max [s]"]
+        width = max([len(name) for name in summary] + [len(header[0])])
+        columns = " ".join(f"{column:>10}" for column in header[1:])
+        print(f"{header[0]:<{width}} {columns}", file=buffer)
+        for name, values in summary.items():
+            print(
+                f"{name:<{width}} {values['count']:>10} {values['total']:>10.3f} "
+                f"{values['avg']:>10.3f} {values['max']:>10.3f}",
+                file=buffer,
+            )
+
+
+tracer = Tracer()
+
+
+def span(name, **tags):
+    """Return span of the global tracer."""
+    return tracer.span(name, **tags)
+
+
+def tagged(**tags):
+    """Add tags to spans of the global tracer started inside the block."""
+    if not tracer.enabled:
+        return _null_span
+    return tracer.tagged(**tags)
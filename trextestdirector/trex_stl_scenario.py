@@ -7,7 +7,7 @@ import signal
 import sys
 import time
 from abc import ABC, abstractmethod
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 from pydoc import locate
 
 from trex.common.trex_exceptions import TRexError
@@ -20,9 +20,35 @@ from trex.stl.api import (
     STLTXCont,
 )
 from trex.utils import text_tables
-from trextestdirector.utilities import is_reachable, update_config, validate_config
-from trextestdirector.stats_printer import print_port_stats, print_latency_stats
-from trextestdirector.errors import TrexTestDirectorInterruptError
+from trextestdirector.utilities import (
+    call_parallel,
+    diff_port_state,
+    distribute,
+    distribute_flows,
+    is_reachable,
+    iter_tests,
+    resolve_ports,
+    update_config,
+    validate_config,
+)
+from trextestdirector.calibration import RateCalibrator
+from trextestdirector.generator_stats import GeneratorMonitor
+from trextestdirector.link_stats import compute_link_stats
+from trextestdirector.rx_capture import RxCapture
+from trextestdirector.stats_delta import delta_stats
+from trextestdirector.stats_printer import (
+    print_generator_stats,
+    print_latency_stats,
+    print_link_stats,
+    print_port_stats,
+    print_rx_capture_stats,
+)
+from trextestdirector.tracing import span, tagged
+from trextestdirector.compact_stats import parse_projection, project_stats
+from trextestdirector.errors import (
+    TrexTestDirectorConfigError,
+    TrexTestDirectorInterruptError,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -37,17 +63,27 @@ class TrexStlScenario(ABC):
         self.servers = []
         self.tests = config["tests"]
         self.test_config = None
+        self.transmit = []
+        self.calibration = {}
+        self.cumulative_stats = False
+        self.stats_projection = parse_projection(config.get("stats_projection", []))
         self.statistics = {}
+        self.checkpoint = None
+        self.force_reset = False
+        self.precompiled = None
+        self.iteration_callbacks = []
+        self.matrix_results = {}
+        self.stats_sampling_interval = 1.0
+        # timeout of each stop call and deadline of the whole abort [s]
+        self.stop_timeout = 1.0
+        self.abort_timeout = 10.0
+        self.generator_monitor = GeneratorMonitor()
+        self.rx_capture = None
+        self._loaded_profiles = {}
         self._server_by_name = {}
         self._server_by_ip = {}
         self._port_by_ip = {}
 
-        for test_config in self.tests:
-            test_name = test_config["name"]
-            self.statistics[test_name] = {}
-            for iteration in range(1, test_config["iterations"] + 1):
-                self.statistics[test_name][iteration] = {}
-
         for server_config in config["servers"]:
             server_name = server_config["name"]
             server_ip = server_config["management_ip"]
@@ -77,78 +113,284 @@ class TrexStlScenario(ABC):
             client = server["client"]
             server_ip = client.ctx.server
             sync_port = client.ctx.sync_port
+            if client.is_connected():
+                logger.debug(f"{server_name}: already connected")
+                continue
             logger.debug(f"{server_name}: connecting to {server_ip}:{sync_port}")
-            if not is_reachable(server_ip, sync_port):
-                error_msg = f"{server_name}: cannot connect to {server_ip}:{sync_port}"
-                logger.error(error_msg)
-                raise Exception(error_msg)
-            client.connect()
-
-    def _disconnect_clients(self):
-        """Disconnect all clients."""
+            with span("connect", server=server_name):
+                if not is_reachable(server_ip, sync_port):
+                    error_msg = (
+                        f"{server_name}: cannot connect to {server_ip}:{sync_port}"
+                    )
+                    logger.error(error_msg)
+                    raise Exception(error_msg)
+                client.connect()
 
-        for client in self.clients:
-            try:
-                client.reset()
-            except TRexError as e:
-                logger.error(e)
+    def _disconnect_client(self, client):
+        """Reset, release and disconnect client."""
+        try:
+            client.reset()
+        except TRexError as e:
+            logger.error(e)
+        try:
+            client.release()
+        except TRexError as e:
+            logger.error(e)
+        if client.is_connected():
             try:
-                client.release()
+                client.disconnect()
             except TRexError as e:
                 logger.error(e)
-            if client.is_connected():
-                try:
-                    client.disconnect()
-                except TRexError as e:
-                    logger.error(e)
+
+    def _call_servers(self, action, method, timeout=None, servers=None):
+        """Call method with client of each connected server in parallel.
+
+        Returns names of servers whose call did not finish within `timeout`.
+        """
+        servers = self.servers if servers is None else servers
+        servers = [server for server in servers if server["client"].is_connected()]
+        calls = [lambda client=server["client"]: method(client) for server in servers]
+        timed_out = []
+        for server, (_, error) in zip(servers, call_parallel(calls, timeout)):
+            if isinstance(error, TimeoutError):
+                timed_out.append(server["name"])
+            if error:
+                logger.error(f"{server['name']}: {action} failed: {error!r}")
+        return timed_out
+
+    def _disconnect_clients(self, timeout=None, servers=None):
+        """Disconnect clients of all or given servers in parallel."""
+        with span("disconnect"):
+            self._call_servers("disconnect", self._disconnect_client, timeout, servers)
+
+    def _stop_traffic(self, timeout=None):
+        """Stop traffic on all servers in parallel.
+
+        Returns names of servers on which stop did not finish within `timeout`.
+        """
+        with span("stop_traffic"):
+            return self._call_servers("stop", lambda client: client.stop(), timeout)
 
     def _set_up_servers(self):
         """Set up servers based on loaded configuration."""
+        self._loaded_profiles = {}
         for server in self.servers:
-            server_name = server["name"]
-            client = server["client"]
-            port_ids = [port["id"] for port in server["ports"]]
-            logger.debug(f"{server_name}: acquiring and resetting ports {port_ids}...")
-            client.reset(port_ids)
-            logger.debug(f"{server_name}: ports {port_ids} acquired")
-            client.set_service_mode(port_ids)
-            for port in server["ports"]:
-                port_id = port["id"]
+            with span("port_setup", server=server["name"]):
+                if self.force_reset:
+                    self._reset_server(server)
+                else:
+                    self._update_server(server)
+
+    def _update_server(self, server):
+        """Set up server applying only differences from current ports state."""
+        server_name = server["name"]
+        client = server["client"]
+        port_ids = [port["id"] for port in server["ports"]]
+        logger.debug(f"{server_name}: acquiring ports {port_ids}...")
+        client.acquire(port_ids, force=True)
+        client.stop(port_ids)
+        client.remove_all_streams(port_ids)
+        # leftovers of previous runs, removed by reset as well
+        client.remove_rx_queue(port_ids)
+        client.remove_all_captures()
+        logger.debug(f"{server_name}: ports {port_ids} acquired")
+        for port in server["ports"]:
+            port_id = port["id"]
+            trex_port = client.get_port(port_id)
+            changes = diff_port_state(
+                port, trex_port.get_ts_attr(), trex_port.is_service_mode_on()
+            )
+            if not changes:
+                logger.debug(f"{server_name}: port {port_id} is already set up")
+                continue
+            logger.debug(f"{server_name}: updating port {port_id}: {changes}")
+            if changes["l3"]:
                 port_ip = port["ip"]
                 default_gateway = port["default_gateway"]
-                logger.debug(f"{server_name}: setting up port {port_id}")
+                # ARP resolution requires service mode
+                client.set_service_mode(port_id)
                 logger.debug(
                     f"{server_name}: port {port_id} set to l3 mode: src_ipv4 = {port_ip}, dst_ipv4 = {default_gateway}"
                 )
                 client.set_l3_mode(port_id, port_ip, default_gateway)
-                service_mode = port.get("service_mode")
-                if service_mode:
-                    logger.debug(f"{server_name}: port {port_id} set to service mode")
-                else:
-                    client.set_service_mode(port_id, enabled=False)
-                attributes = port.get("attributes")
-                if attributes:
-                    client.set_port_attr(port_id, **attributes)
-                    logger.debug(
-                        f"{server_name}: port {port_id} attributes set: {attributes}"
-                    )
-            client.clear_stats(port_ids)
+            if changes["l3"] or changes["service_mode"]:
+                client.set_service_mode(port_id, enabled=port["service_mode"])
+            if changes["attributes"]:
+                client.set_port_attr(port_id, **changes["attributes"])
+                logger.debug(
+                    f"{server_name}: port {port_id} attributes set: {changes['attributes']}"
+                )
+        client.clear_stats(port_ids)
+
+    def _reset_server(self, server):
+        """Reset server ports and set them up from scratch."""
+        server_name = server["name"]
+        client = server["client"]
+        port_ids = [port["id"] for port in server["ports"]]
+        logger.debug(f"{server_name}: acquiring and resetting ports {port_ids}...")
+        client.reset(port_ids)
+        logger.debug(f"{server_name}: ports {port_ids} acquired")
+        client.set_service_mode(port_ids)
+        for port in server["ports"]:
+            port_id = port["id"]
+            port_ip = port["ip"]
+            default_gateway = port["default_gateway"]
+            logger.debug(f"{server_name}: setting up port {port_id}")
+            logger.debug(
+                f"{server_name}: port {port_id} set to l3 mode: src_ipv4 = {port_ip}, dst_ipv4 = {default_gateway}"
+            )
+            client.set_l3_mode(port_id, port_ip, default_gateway)
+            service_mode = port.get("service_mode")
+            if service_mode:
+                logger.debug(f"{server_name}: port {port_id} set to service mode")
+            else:
+                client.set_service_mode(port_id, enabled=False)
+            attributes = port.get("attributes")
+            if attributes:
+                client.set_port_attr(port_id, **attributes)
+                logger.debug(
+                    f"{server_name}: port {port_id} attributes set: {attributes}"
+                )
+        client.clear_stats(port_ids)
 
     def _set_up_test(self, test):
         """Set up test."""
         for client in self.clients:
             client.stop()
-            client.remove_all_streams()
             client.remove_rx_queue()
         test["iteration"] = 0
         self.test_config = test
+        self.transmit = self._resolve_transmit(test)
+        self.generator_monitor = GeneratorMonitor(test.get("generator_thresholds"))
+        self.rx_capture = None
+        if test.get("rx_capture"):
+            self.rx_capture = self._create_rx_capture(test)
         self._load_traffic_profiles(test)
+        self.calibration = {}
+        if test.get("calibration"):
+            with span("calibration", test=test["name"]):
+                calibrator = RateCalibrator(test["calibration"])
+                self.calibration = calibrator.calibrate(self.servers, self.transmit)
+            # traffic sent during calibration is not a part of test results
+            for client in self.clients:
+                client.clear_stats()
 
-    def _load_traffic_profiles(self, test_config):
-        """Load traffic profiles for all ports based on loaded configuration."""
-        test_name = test_config["name"]
-        logger.debug(f"{test_name}: loading traffic profiles")
+    def _create_rx_capture(self, test_config):
+        """Return RX capture of test's ports, by default of all receiving ports."""
+        settings = test_config["rx_capture"]
+        settings = settings if isinstance(settings, dict) else {}
+        if settings.get("ports"):
+            servers = list(self._server_by_name.values())
+            ports = resolve_ports(settings["ports"], servers)
+        else:
+            ports = list(OrderedDict.fromkeys(entry["to"] for entry in self.transmit))
+        return RxCapture(settings, ports)
+
+    def _get_port_speed(self, server_name, port_id):
+        """Return port speed in bps or None if it is not known."""
+        client = self.get_server_by_name(server_name)["client"]
+        if not client.is_connected():
+            return None
+        try:
+            return client.get_port(int(port_id)).get_speed_bps()
+        except (TRexError, KeyError) as e:
+            logger.warning(f"{server_name}: cannot get port {port_id} speed: {e}")
+            return None
+
+    def _rate_weights(self, test_name, rate_group, tx_ports):
+        """Return weights splitting rate of a rate group across its ports.
+
+        Precompiled profiles were compiled with their own split, which is
+        reused so that loaded streams match. Otherwise ports are weighted by
+        their speed, or equally if speeds of all ports are not known.
+        """
+        if self.precompiled:
+            weights = self.precompiled.get_rate_weights(test_name, rate_group)
+            if weights and len(weights) == len(tx_ports):
+                return weights
+        speeds = [self._get_port_speed(*port.split(":")) for port in tx_ports]
+        return speeds if all(speeds) else [1] * len(tx_ports)
+
+    def _resolve_transmit(self, test_config):
+        """Return test's transmit configuration with one entry per link.
+
+        Entries with multiple source ports are split into one entry per source
+        port. `total_pps` is distributed across source ports weighted by their
+        speed and `flows` are split into `flow_offset` and `flow_count`
+        tunables. Split links with flow stats get consecutive pg_ids starting
+        from `flow_stats_pg_id` of the entry, because TRex requires a unique
+        pg_id per stream.
+        """
+        transmit = []
         for tx_config in test_config["transmit"]:
+            tx_ports = resolve_ports(tx_config["from"], self.servers)
+            rx_ports = resolve_ports(tx_config["to"], self.servers)
+            if (
+                len(tx_ports) == 1
+                and "total_pps" not in tx_config
+                and "flows" not in tx_config
+            ):
+                transmit.append({**tx_config, "from": tx_ports[0], "to": rx_ports[0]})
+                continue
+            if len(rx_ports) == 1:
+                rx_ports = rx_ports * len(tx_ports)
+            rate_group = "->".join(
+                ",".join(spec) if isinstance(spec, list) else spec
+                for spec in (tx_config["from"], tx_config["to"])
+            )
+            weights = self._rate_weights(test_config["name"], rate_group, tx_ports)
+            rates = distribute(tx_config.get("total_pps", 0), weights)
+            flows = distribute_flows(tx_config.get("flows", 0), weights)
+            for idx, (tx_port, rx_port, rate, (flow_offset, flow_count)) in enumerate(
+                zip(tx_ports, rx_ports, rates, flows)
+            ):
+                tunables = dict(tx_config.get("tunables", {}))
+                if tunables.get("flow_stats") and tunables.get("flow_stats_pg_id"):
+                    tunables["flow_stats_pg_id"] += idx
+                if "total_pps" in tx_config:
+                    tunables["pps"] = rate
+                if "flows" in tx_config:
+                    tunables["flow_offset"] = flow_offset
+                    tunables["flow_count"] = flow_count
+                entry = {
+                    key: value
+                    for key, value in tx_config.items()
+                    if key not in ("total_pps", "flows")
+                }
+                entry.update(
+                    {
+                        "from": tx_port,
+                        "to": rx_port,
+                        "tunables": tunables,
+                        "rate_group": rate_group,
+                        "rate_group_pps": tx_config.get("total_pps"),
+                    }
+                )
+                transmit.append(entry)
+        pg_ids = [
+            tx_config["tunables"]["flow_stats_pg_id"]
+            for tx_config in transmit
+            if tx_config.get("tunables", {}).get("flow_stats")
+            and tx_config["tunables"].get("flow_stats_pg_id")
+        ]
+        duplicates = sorted({pg_id for pg_id in pg_ids if pg_ids.count(pg_id) > 1})
+        if duplicates:
+            msg = f"{test_config['name']}: pg_ids {duplicates} are used by more than one link."
+            raise TrexTestDirectorConfigError(msg)
+        return transmit
+
+    def _plan_traffic_profiles(self, test_config):
+        """Return streams to load on each port as a list of stream definitions.
+
+        Streams are planned for links of `self.transmit`, resolved by
+        `_set_up_test`. Stream definitions are keyed by (server name, port id).
+        Transmitting ports get ("profile", profile_file, tunables) definitions,
+        receiving ports of other servers get ("flow_stats", type, pg_id)
+        definitions.
+        """
+        test_name = test_config["name"]
+        plan = defaultdict(list)
+        for tx_config in self.transmit:
             tx_server_name, tx_port_id = tx_config["from"].split(":")
             rx_server_name, rx_port_id = tx_config["to"].split(":")
             tx_port_ip = self.get_port_by_id(tx_server_name, tx_port_id)["ip"]
@@ -165,12 +407,8 @@ class TrexStlScenario(ABC):
                 profile_file = os.path.join(
                     os.path.dirname(os.path.abspath(__file__)), "default_profile.py",
                 )
-            client = self.get_server_by_name(tx_server_name)["client"]
-            profile = STLProfile.load(profile_file, port_id=tx_port_id, **tunables)
-            stream_ids = client.add_streams(profile.get_streams(), tx_port_id)
-            stream_ids = stream_ids if isinstance(stream_ids, list) else [stream_ids]
-            logger.debug(
-                f"Added {len(stream_ids)} streams to {tx_server_name} port {tx_port_id}"
+            plan[(tx_server_name, int(tx_port_id))].append(
+                ("profile", profile_file, tunables)
             )
             # to measure stats we need to attach to the receiver
             # a stream with pg_id of transmitter's stats stream, because
@@ -189,22 +427,69 @@ class TrexStlScenario(ABC):
                     raise Exception("Streams with flow stats must have defined pg_id")
                 if rx_server_name == tx_server_name:
                     continue
-                if flow_stats_type == "latency":
-                    flow_stats = STLFlowLatencyStats(pg_id=pg_id)
-                else:
-                    flow_stats = STLFlowStats(pg_id=pg_id)
-                flow_stats_stream = STLStream(flow_stats=flow_stats, start_paused=True)
-                flow_stats_profile = STLProfile(flow_stats_stream)
-                rx_server_client = self.get_server_by_name(rx_server_name)["client"]
-                stream_ids = rx_server_client.add_streams(
-                    flow_stats_profile.get_streams(), rx_port_id
+                plan[(rx_server_name, int(rx_port_id))].append(
+                    ("flow_stats", flow_stats_type, pg_id)
                 )
-                stream_ids = (
-                    stream_ids if isinstance(stream_ids, list) else [stream_ids]
+        return plan
+
+    def _get_streams(self, stream, port_id):
+        """Return list of STLStream objects for stream definition."""
+        if stream[0] == "profile":
+            _, profile_file, tunables = stream
+            if self.precompiled:
+                stl_streams = self.precompiled.get_streams(
+                    profile_file, tunables, port_id
                 )
+                if stl_streams is not None:
+                    return stl_streams
+            profile = STLProfile.load(profile_file, port_id=port_id, **tunables)
+        else:
+            _, flow_stats_type, pg_id = stream
+            if flow_stats_type == "latency":
+                flow_stats = STLFlowLatencyStats(pg_id=pg_id)
+            else:
+                flow_stats = STLFlowStats(pg_id=pg_id)
+            profile = STLProfile(STLStream(flow_stats=flow_stats, start_paused=True))
+        return profile.get_streams()
+
+    def _load_traffic_profiles(self, test_config):
+        """Load traffic profiles for all ports based on loaded configuration.
+
+        Streams are reloaded only on ports whose stream definitions differ from
+        the ones loaded by the previous test. Streams are removed from all such
+        ports before any stream is added, because pg_ids must be unique on a
+        server and the previous test could have used them on other ports.
+        """
+        test_name = test_config["name"]
+        logger.debug(f"{test_name}: loading traffic profiles")
+        plan = self._plan_traffic_profiles(test_config)
+        changed_ports = []
+        for server in self.servers:
+            server_name = server["name"]
+            for port in server["ports"]:
+                port_id = port["id"]
+                streams = plan.get((server_name, port_id), [])
+                if self._loaded_profiles.get((server_name, port_id)) == streams:
+                    logger.debug(
+                        f"{test_name}: streams on {server_name} port {port_id} are up to date"
+                    )
+                    continue
+                server["client"].remove_all_streams(ports=[port_id])
+                self._loaded_profiles.pop((server_name, port_id), None)
+                changed_ports.append((server, port_id, streams))
+        for server, port_id, streams in changed_ports:
+            server_name = server["name"]
+            client = server["client"]
+            for stream in streams:
+                with span("profile_compile", server=server_name, port=port_id):
+                    stl_streams = self._get_streams(stream, port_id)
+                with span("stream_upload", server=server_name, port=port_id):
+                    stream_ids = client.add_streams(stl_streams, port_id)
+                stream_ids = stream_ids if isinstance(stream_ids, list) else [stream_ids]
                 logger.debug(
-                    f"{test_name}: Added {len(stream_ids)} streams to {rx_server_name} port {rx_port_id}"
+                    f"{test_name}: Added {len(stream_ids)} streams to {server_name} port {port_id}"
                 )
+            self._loaded_profiles[(server_name, port_id)] = streams
         logger.debug(f"{test_name}: traffic profiles succesfully loaded")
 
     def _set_up(self):
@@ -215,13 +500,30 @@ class TrexStlScenario(ABC):
 
     def _tear_down(self):
         """Clean up after test."""
-        for client in self.clients:
-            client.stop()
+        self._stop_traffic()
         self._disconnect_clients()
 
+    def _abort(self):
+        """Stop traffic on all servers and tear down within `abort_timeout`.
+
+        Each stop call has its own `stop_timeout`, so a hung server does not
+        delay stopping traffic on other servers. Clients of servers, which did
+        not stop in time, are abandoned, because their client is still busy
+        with the stop call.
+        """
+        deadline = time.monotonic() + self.abort_timeout
+        logger.warning("Aborting test. Stopping traffic on all servers")
+        hung = self._stop_traffic(min(self.stop_timeout, self.abort_timeout))
+        for server_name in hung:
+            logger.error(f"{server_name}: abandoning client, traffic may be running")
+        self._disconnect_clients(
+            max(0, deadline - time.monotonic()),
+            [server for server in self.servers if server["name"] not in hung],
+        )
+
     def _sigint_handler(self, sig, frame):
+        # no RPCs here, servers are handled by the abort path
         logger.debug(f"Received SIGINT. Aborting test...")
-        self.print_test_results()
         raise TrexTestDirectorInterruptError
 
     def _register_sigint_handler(self):
@@ -293,17 +595,23 @@ class TrexStlScenario(ABC):
 
         return port
 
-    def print_test_results(self, servers=None):
-        """Print TRex stats for each server."""
+    def print_test_results(self, servers=None, statistics=None):
+        """Print TRex stats for each server.
+
+        If statistics (where server names are keys) are not provided, current
+        stats are fetched from servers.
+        """
         servers = servers if servers else self.servers
         for server in servers:
             server_name = server["name"]
-            server_header = f"Stats summary for {server_name}"
-            print("-" * len(server_header))
-            print(server_header)
-            print("-" * len(server_header))
-            print_port_stats(server)
-            print_latency_stats(server)
+            stats = statistics.get(server_name) if statistics else None
+            with span("print_results", server=server_name):
+                server_header = f"Stats summary for {server_name}"
+                print("-" * len(server_header))
+                print(server_header)
+                print("-" * len(server_header))
+                print_port_stats(server, stats=stats)
+                print_latency_stats(server, stats=stats)
 
     def start_traffic(self, servers=None, wait_for_traffic=True):
         servers = servers if servers else self.servers
@@ -316,39 +624,144 @@ class TrexStlScenario(ABC):
                 port_streams = client.get_port(port_id).get_all_streams()
                 if port_streams:
                     port_to_run_ids.append(port_id)
-            # We only need to start all ports with streams
-            if port_to_run_ids:
+            # We only need to start all ports with streams. Ports with
+            # calibrated rate are started with their own multiplier.
+            ports_by_factor = defaultdict(list)
+            for port_id in port_to_run_ids:
+                calibration = self.calibration.get(f"{server_name}:{port_id}", {})
+                ports_by_factor[calibration.get("factor", 1.0)].append(port_id)
+            for factor, port_ids in ports_by_factor.items():
                 logger.debug(
-                    f"{server_name}: starting traffic on ports: {port_to_run_ids}"
+                    f"{server_name}: starting traffic on ports: {port_ids} (multiplier {factor})"
                 )
                 client.start(
-                    ports=port_to_run_ids,
+                    ports=port_ids,
+                    mult=f"{factor:f}",
                     duration=self.test_config["duration"],
                     force=True,
                 )
         if wait_for_traffic:
-            for server in self.servers:
-                client = server["client"]
-                client.wait_on_traffic()
+            self.wait_on_traffic()
+
+    def wait_on_traffic(self):
+        """Wait until traffic stops, sampling generators utilization meanwhile."""
+        while any(server["client"].is_traffic_active() for server in self.servers):
+            with span("stats_sampling"):
+                self.generator_monitor.sample(self.servers)
+            time.sleep(self.stats_sampling_interval)
+        for server in self.servers:
+            client = server["client"]
+            client.wait_on_traffic()
 
     def run(self):
         """Set up, perform and tear down test."""
-        self._set_up()
-        for test_config in self.tests:
-            self._set_up_test(test_config)
-            test_name = test_config["name"]
-            for iteration in range(1, int(test_config["iterations"]) + 1):
-                print(f"Starting test {test_name}: iteration {iteration}")
-                self.test()
-                for server in self.servers:
-                    server_name = server["name"]
-                    stats = server["client"].get_stats()
-                    self.statistics[test_name][iteration][server_name] = stats
-                print(f"Test {test_name}: iteration {iteration} finished")
-                print(f"Results for test {test_name}: iteration {iteration}")
-                self.print_test_results()
+        try:
+            self._set_up()
+            self.run_tests()
+        except TrexTestDirectorInterruptError:
+            # repeated Ctrl-C must not interrupt the bounded abort
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            self._abort()
+            raise
         self._tear_down()
 
+    def _get_stats(self):
+        """Return current stats of all servers, where server names are keys."""
+        stats = {}
+        for server in self.servers:
+            server_name = server["name"]
+            with span("stats_fetch", server=server_name):
+                stats[server_name] = server["client"].get_stats()
+        return stats
+
+    def _summarize_iteration(self, stats, traffic_duration):
+        """Return link, generator and calibration summary of iteration stats."""
+        summary = compute_link_stats(self.transmit, stats, traffic_duration)
+        summary["generator"] = self.generator_monitor.finish(stats, self.transmit)
+        summary["generator_limited"] = any(
+            generator["limited"] for generator in summary["generator"].values()
+        )
+        if self.calibration:
+            summary["calibration"] = self.calibration
+        if self.rx_capture:
+            with span("rx_capture"):
+                summary["rx_capture"] = self.rx_capture.finish()
+        return summary
+
+    def run_tests(self):
+        """Perform all tests on already set up servers."""
+        if self.checkpoint:
+            self.checkpoint.restore(self.statistics)
+        for test_config in iter_tests(self.tests):
+            test_name = test_config["name"]
+            iterations = range(1, int(test_config["iterations"]) + 1)
+            test_statistics = self.statistics.setdefault(test_name, {})
+            for iteration in iterations:
+                test_statistics.setdefault(iteration, {})
+            if "matrix_point" in test_config:
+                matrix_name = test_config["matrix_name"]
+                matrix_results = self.matrix_results.setdefault(matrix_name, {})
+                matrix_results[test_config["matrix_point"]] = test_statistics
+            if self.checkpoint and all(
+                self.checkpoint.is_completed(test_name, iteration)
+                for iteration in iterations
+            ):
+                logger.info(f"{test_name}: already completed. Skipping")
+                continue
+            with span("test_set_up", test=test_name):
+                self._set_up_test(test_config)
+            for iteration in iterations:
+                if self.checkpoint and self.checkpoint.is_completed(
+                    test_name, iteration
+                ):
+                    logger.info(f"{test_name}: iteration {iteration} already completed")
+                    continue
+                # spans of the iteration are tagged with test and iteration
+                with tagged(test=test_name, iteration=iteration):
+                    print(f"Starting test {test_name}: iteration {iteration}")
+                    baseline_stats = self._get_stats()
+                    self.generator_monitor.start()
+                    if self.rx_capture:
+                        self.rx_capture.start(self.servers)
+                    with span("traffic", test=test_name, iteration=iteration):
+                        traffic_start = time.time()
+                        self.test()
+                        traffic_duration = time.time() - traffic_start
+                    cumulative_stats = self._get_stats()
+                    full_statistics = {
+                        server_name: delta_stats(baseline_stats[server_name], stats)
+                        for server_name, stats in cumulative_stats.items()
+                    }
+                    summary = self._summarize_iteration(
+                        full_statistics, traffic_duration
+                    )
+                    if self.cumulative_stats:
+                        summary["cumulative"] = {
+                            server_name: project_stats(stats, self.stats_projection)
+                            for server_name, stats in cumulative_stats.items()
+                        }
+                    iteration_statistics = self.statistics[test_name][iteration]
+                    for server_name, stats in full_statistics.items():
+                        iteration_statistics[server_name] = project_stats(
+                            stats, self.stats_projection
+                        )
+                    iteration_statistics["summary"] = summary
+                    if self.checkpoint:
+                        self.checkpoint.mark_completed(
+                            test_name, iteration, self.statistics[test_name][iteration]
+                        )
+                    for callback in self.iteration_callbacks:
+                        callback(
+                            test_name, iteration, self.statistics[test_name][iteration]
+                        )
+                    print(f"Test {test_name}: iteration {iteration} finished")
+                    print(f"Results for test {test_name}: iteration {iteration}")
+                    self.print_test_results(statistics=full_statistics)
+                    print_link_stats(summary, full_statistics)
+                    print_generator_stats(summary)
+                    if "rx_capture" in summary:
+                        print_rx_capture_stats(summary)
+
     @abstractmethod
     def test(self):
         """This method should implement test procedure."""
@@ -1,15 +1,18 @@
 import collections
+import itertools
 import json
 import logging
 import logging.config
 import os.path
 import socket
+import threading
 import time
 from collections import defaultdict
 
 import yaml
 
 from trextestdirector.errors import TrexTestDirectorConfigError
+from trextestdirector.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +23,21 @@ _server_config_optional_values = {
 
 _port_optional_values = {"service_mode": False, "attributes": {}}
 
+# Mapping of STLClient.set_port_attr arguments to paths in port's attributes
+_port_attributes_paths = {
+    "promiscuous": ("promiscuous", "enabled"),
+    "multicast": ("multicast", "enabled"),
+    "link_up": ("link", "up"),
+    "led_on": ("led", "on"),
+    "flow_ctrl": ("fc", "mode"),
+}
+
+# Port attributes restored by STLClient.reset, applied if not set in config
+_port_attributes_defaults = {"promiscuous": False}
+
+# Keys of iteration statistics which are not server names
+_reserved_server_names = ("summary",)
+
 _test_config_optional_values = {
     "name": "untitled_test",
     "duration": -1,
@@ -44,6 +62,11 @@ _default_logging_config = {
 
 def is_reachable(ip, port, timeout=1, max_retries=10, retry_interval=2):
     """Check whether server is reachable or not."""
+    with span("reachability", ip=ip, port=port):
+        return _is_reachable(ip, port, timeout, max_retries, retry_interval)
+
+
+def _is_reachable(ip, port, timeout, max_retries, retry_interval):
     s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     s.settimeout(timeout)
     for try_count in range(max_retries + 1):
@@ -62,6 +85,34 @@ def is_reachable(ip, port, timeout=1, max_retries=10, retry_interval=2):
     return False
 
 
+def call_parallel(calls, timeout=None):
+    """Call functions in parallel and wait for them at most `timeout` seconds.
+
+    Returns a list of (result, exception) pairs in order of calls. Calls that
+    did not finish in time get TimeoutError as exception and keep running in
+    daemon threads, so a hung call cannot block the caller or its exit.
+    """
+    error = TimeoutError(f"call did not finish in {timeout} s")
+    results = [(None, error)] * len(calls)
+
+    def run(idx, call):
+        try:
+            results[idx] = (call(), None)
+        except Exception as e:
+            results[idx] = (None, e)
+
+    threads = [
+        threading.Thread(target=run, args=(idx, call), daemon=True)
+        for idx, call in enumerate(calls)
+    ]
+    for thread in threads:
+        thread.start()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    for thread in threads:
+        thread.join(None if deadline is None else max(0, deadline - time.monotonic()))
+    return list(results)
+
+
 def load_config(path):
     """Load config from YAML or JSON file."""
     config = None
@@ -116,6 +167,9 @@ def validate_servers_config(servers_config):
     server_names = set()
     for server in servers_config:
         server_name = server["name"]
+        if server_name in _reserved_server_names:
+            msg = f"{server_name}: name {server_name} is reserved."
+            raise TrexTestDirectorConfigError(msg)
         if server_name in server_names:
             msg = f"{server_name}: name {server_name} is used multiple times."
             raise TrexTestDirectorConfigError(msg)
@@ -131,6 +185,58 @@ def validate_servers_config(servers_config):
                     raise TrexTestDirectorConfigError(msg)
 
 
+def resolve_ports(ports_spec, servers_config):
+    """Return list of "server:port" strings for ports specification.
+
+    Specification is a "server:port" string, a "server:*" string matching all
+    ports of the server or a list of these.
+    """
+    ports_specs = ports_spec if isinstance(ports_spec, list) else [ports_spec]
+    ports = []
+    for port_spec in ports_specs:
+        server_name, port_id = str(port_spec).split(":")
+        if port_id != "*":
+            ports.append(f"{server_name}:{port_id}")
+            continue
+        for server_config in servers_config:
+            if server_config["name"] == server_name:
+                for port in server_config["ports"]:
+                    ports.append(f"{server_name}:{port['id']}")
+                break
+        else:
+            msg = f"Server {server_name} is not defined in servers configuration."
+            raise TrexTestDirectorConfigError(msg)
+    return ports
+
+
+def distribute(total, weights):
+    """Split total proportionally to weights."""
+    weights_sum = sum(weights)
+    return [total * weight / weights_sum for weight in weights]
+
+
+def distribute_flows(flows, weights):
+    """Split number of flows proportionally to weights into (offset, count)."""
+    counts = [int(share) for share in distribute(flows, weights)]
+    for idx in range(flows - sum(counts)):
+        counts[idx % len(counts)] += 1
+    offsets = [sum(counts[:idx]) for idx in range(len(counts))]
+    return list(zip(offsets, counts))
+
+
+def requested_port_rates(transmit_config):
+    """Return requested TX rate [pps] of each "server:port" based on tunables."""
+    rates = defaultdict(float)
+    for tx_config in transmit_config:
+        tunables = tx_config.get("tunables", {})
+        if "pps" not in tunables:
+            continue
+        rates[tx_config["from"]] += tunables["pps"]
+        if tunables.get("flow_stats"):
+            rates[tx_config["from"]] += tunables.get("flow_stats_pps", 0)
+    return rates
+
+
 def validate_tests_config(tests_config, servers_config):
     """Validate 'tests' part of configuration file."""
     # Define required test config fields to validate
@@ -149,6 +255,15 @@ def validate_tests_config(tests_config, servers_config):
             msg = f"{test_name}: test name {test_name} is used multiple times."
             raise TrexTestDirectorConfigError(msg)
         test_names.add(test_name)
+        if "matrix" in test:
+            validate_matrix_config(test)
+            for matrix_test_name in _matrix_test_names(test):
+                if matrix_test_name in test_names:
+                    msg = f"{test_name}: generated test name {matrix_test_name} is used multiple times."
+                    raise TrexTestDirectorConfigError(msg)
+                test_names.add(matrix_test_name)
+        if test.get("rx_capture"):
+            validate_rx_capture_config(test, servers_config)
         for field in test_required_fields:
             if field not in test:
                 msg = f"{test_name}: missing required field {field} in configuration."
@@ -160,26 +275,195 @@ def validate_tests_config(tests_config, servers_config):
                         f"{test_name}: missing required field {field} in configuration."
                     )
                     raise TrexTestDirectorConfigError(msg)
-            tx_server_name, tx_port_id = tx_config["from"].split(":")
-            rx_server_name, rx_port_id = tx_config["to"].split(":")
-            if (
-                tx_server_name not in servers
-                or int(tx_port_id) not in servers[tx_server_name]
-            ):
-                msg = f"{test_name}: server {tx_server_name} port {tx_port_id} is not defined in servers configuration."
+            tx_ports = resolve_ports(tx_config["from"], servers_config)
+            rx_ports = resolve_ports(tx_config["to"], servers_config)
+            if len(rx_ports) not in (1, len(tx_ports)):
+                msg = f"{test_name}: number of 'to' ports must be 1 or equal to number of 'from' ports."
                 raise TrexTestDirectorConfigError(msg)
-            if (
-                rx_server_name not in servers
-                or int(rx_port_id) not in servers[rx_server_name]
-            ):
-                msg = f"{test_name}: server {rx_server_name} port {rx_port_id} is not defined in servers configuration."
+            for port in tx_ports + rx_ports:
+                server_name, port_id = port.split(":")
+                if (
+                    server_name not in servers
+                    or int(port_id) not in servers[server_name]
+                ):
+                    msg = f"{test_name}: server {server_name} port {port_id} is not defined in servers configuration."
+                    raise TrexTestDirectorConfigError(msg)
+
+
+def validate_workers_config(workers_config, servers_config):
+    """Validate 'workers' part of configuration file."""
+    server_names = [server_config["name"] for server_config in servers_config]
+    owners = {}
+    for worker_idx, worker in enumerate(workers_config or []):
+        worker_name = worker.get("address", f"worker {worker_idx}")
+        if not worker.get("servers"):
+            msg = f"{worker_name}: missing required field servers in worker configuration."
+            raise TrexTestDirectorConfigError(msg)
+        if "token" in worker and not isinstance(worker["token"], str):
+            msg = f"{worker_name}: token in worker configuration must be a string."
+            raise TrexTestDirectorConfigError(msg)
+        for server_name in worker["servers"]:
+            if server_name not in server_names:
+                msg = f"{worker_name}: server {server_name} is not defined in servers configuration."
                 raise TrexTestDirectorConfigError(msg)
+            if server_name in owners:
+                msg = f"{worker_name}: server {server_name} is already owned by {owners[server_name]}."
+                raise TrexTestDirectorConfigError(msg)
+            owners[server_name] = worker_name
+    for server_name in server_names:
+        if server_name not in owners:
+            msg = f"{server_name}: server is not owned by any worker."
+            raise TrexTestDirectorConfigError(msg)
+
+
+def validate_rx_capture_config(test_config, servers_config):
+    """Validate 'rx_capture' part of test configuration."""
+    test_name = test_config["name"]
+    rx_capture = test_config["rx_capture"]
+    if not isinstance(rx_capture, dict):
+        return
+    if rx_capture.get("ports"):
+        for port in resolve_ports(rx_capture["ports"], servers_config):
+            server_name, port_id = port.split(":")
+            server_ports = [
+                port_config["id"]
+                for server_config in servers_config
+                if server_config["name"] == server_name
+                for port_config in server_config["ports"]
+            ]
+            if int(port_id) not in server_ports:
+                msg = f"{test_name}: RX capture port {server_name}:{port_id} is not defined in servers configuration."
+                raise TrexTestDirectorConfigError(msg)
+    if rx_capture.get("mode", "fixed") not in ("fixed", "cyclic"):
+        msg = f"{test_name}: RX capture mode must be 'fixed' or 'cyclic'."
+        raise TrexTestDirectorConfigError(msg)
+    if rx_capture.get("seq_size", 4) not in (1, 2, 4, 8):
+        msg = f"{test_name}: RX capture seq_size must be 1, 2, 4 or 8 bytes."
+        raise TrexTestDirectorConfigError(msg)
+
+
+def validate_matrix_config(test_config):
+    """Validate 'matrix' part of test configuration."""
+    test_name = test_config["name"]
+    matrix = test_config["matrix"]
+    if not isinstance(matrix, dict) or not matrix:
+        msg = f"{test_name}: matrix must be a non-empty map of tunables."
+        raise TrexTestDirectorConfigError(msg)
+    for tunable, values in matrix.items():
+        if not isinstance(values, list) or not values:
+            msg = f"{test_name}: matrix tunable {tunable} must be a non-empty list."
+            raise TrexTestDirectorConfigError(msg)
+
+
+def _matrix_points(test_config):
+    """Yield tunables of each point of test's parameters matrix."""
+    matrix = test_config["matrix"]
+    tunable_names = list(matrix)
+    for point in itertools.product(*(matrix[name] for name in tunable_names)):
+        yield dict(zip(tunable_names, point))
+
+
+def _matrix_test_name(test_name, point_tunables):
+    parameters = ",".join(f"{name}={value}" for name, value in point_tunables.items())
+    return f"{test_name}[{parameters}]"
+
+
+def _matrix_test_names(test_config):
+    """Yield names of tests generated from test's parameters matrix."""
+    for point_tunables in _matrix_points(test_config):
+        yield _matrix_test_name(test_config["name"], point_tunables)
+
+
+def expand_test_matrix(test_config):
+    """Generate tests for each point of test's parameters matrix.
+
+    Each generated test has tunables of all its transmit entries updated with
+    matrix point values and a deterministic name, e.g.
+    "rfc2544[pkt_size=64,pps=1000]".
+    """
+    for point_tunables in _matrix_points(test_config):
+        point = tuple(point_tunables.values())
+        test = {key: value for key, value in test_config.items() if key != "matrix"}
+        test["name"] = _matrix_test_name(test_config["name"], point_tunables)
+        test["matrix_name"] = test_config["name"]
+        test["matrix_point"] = point
+        test["transmit"] = []
+        for tx_config in test_config["transmit"]:
+            tunables = {**tx_config.get("tunables", {}), **point_tunables}
+            test["transmit"].append({**tx_config, "tunables": tunables})
+        yield test
+
+
+def iter_tests(tests_config):
+    """Iterate over tests expanding parameters matrices on the fly.
+
+    Raises TrexTestDirectorConfigError if a test name repeats, because
+    results of such tests would be merged.
+    """
+    test_names = set()
+    for test_config in tests_config:
+        if test_config.get("matrix"):
+            tests = expand_test_matrix(test_config)
+        else:
+            tests = [test_config]
+        for test in tests:
+            if test["name"] in test_names:
+                msg = f"{test['name']}: test name is used multiple times."
+                raise TrexTestDirectorConfigError(msg)
+            test_names.add(test["name"])
+            yield test
 
 
 def validate_config(config):
     """Check if config has defined required fields."""
     validate_servers_config(config["servers"])
     validate_tests_config(config["tests"], config["servers"])
+    if "workers" in config:
+        validate_workers_config(config["workers"], config["servers"])
+    projection = config.get("stats_projection")
+    if projection is not None and not (
+        isinstance(projection, list)
+        and all(isinstance(path, str) and path for path in projection)
+    ):
+        raise TrexTestDirectorConfigError(
+            "stats_projection has to be a list of stats paths"
+        )
+
+
+def diff_port_state(port_config, port_attr, service_mode_on):
+    """Compare port configuration with port's current state.
+
+    Returns a dict describing what has to be changed on the port: whether L3
+    mode has to be set, whether service mode has to be toggled and which port
+    attributes have to be set. Attributes missing in the configuration are
+    compared with their reset defaults. Returns None if port is already set up.
+    """
+    ipv4 = port_attr.get("layer_cfg", {}).get("ipv4", {})
+    l3 = (
+        ipv4.get("state") != "resolved"
+        or ipv4.get("src") != port_config["ip"]
+        or ipv4.get("dst") != port_config["default_gateway"]
+    )
+    service_mode = bool(port_config["service_mode"]) != bool(service_mode_on)
+    attributes = {}
+    for name, value in {
+        **_port_attributes_defaults,
+        **port_config["attributes"],
+    }.items():
+        path = _port_attributes_paths.get(name)
+        current = port_attr
+        for level in path or ():
+            current = current.get(level) if isinstance(current, dict) else None
+        if name not in port_config["attributes"]:
+            # defaults are restored only on ports reporting the attribute
+            if current is not None and current != value:
+                attributes[name] = value
+        # attributes that cannot be read back are always applied
+        elif not path or current != value:
+            attributes[name] = value
+    if not (l3 or service_mode or attributes):
+        return None
+    return {"l3": l3, "service_mode": service_mode, "attributes": attributes}
 
 
 def set_up_logging(path):
@@ -219,6 +503,14 @@ def format_num(size, unit="", compact=True):
     return txt
 
 
+def json_default(obj):
+    """Serialize compact stats and other objects providing `to_dict`."""
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
 def save_results_to_file(stats, file_name):
-    with open(file_name, "w+") as file_handler:
-        json.dump(stats, file_handler, indent=2)
+    with span("write_results", file=file_name):
+        with open(file_name, "w+") as file_handler:
+            json.dump(stats, file_handler, indent=2, default=json_default)